@@ -0,0 +1,211 @@
+"""Driver benchmarks against the stpm34sim simulator
+
+Runs each driver operation against a simulated STPM34 on a recording bus
+and reports, per call: chip select windows (frames), bytes clocked each
+way, wall time, frame throughput, and Python heap use measured with
+tracemalloc. The heap peak includes the simulator's own allocations, so
+compare it between runs rather than reading it as an absolute; the live
+block count only looks at allocations made in the stpm34 package that are
+still alive afterwards.
+
+    python bench/bench_driver.py
+    python bench/bench_driver.py --json results.json
+    python bench/bench_driver.py --baseline results.json --threshold 0.10
+
+With --baseline the run fails (exit status 1) if any operation uses more
+frames or bytes than the baseline, or more than ``threshold`` extra time
+or heap.
+"""
+
+# Copyright (c) 2020 Tyler Cone
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+#     The above copyright notice and this permission notice shall be included in all
+#     copies or substantial portions of the Software.
+#
+#     THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+#     IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+#     FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+#     AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+#     LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+#     OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+#     SOFTWARE.
+
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from stpm34 import Stpm34  # noqa: E402
+from stpm34sim import Channel, FakePin, FakeSPI, Stpm34Device  # noqa: E402
+
+
+class RecordingPin(FakePin):
+    """Chip select that counts the windows it opens"""
+
+    def __init__(self, value=1):
+        super(RecordingPin, self).__init__(value)
+        self.windows = 0
+
+    def value(self, value=None):
+        if value is not None and not value and self._value:
+            self.windows += 1
+        return super(RecordingPin, self).value(value)
+
+
+class Rig(object):
+    """One simulated device with a driver talking to it"""
+
+    def __init__(self, latch_mode, latch_delay):
+        self.bus = FakeSPI()
+        self.cs = RecordingPin()
+        self.device = Stpm34Device(Channel(230.0, 5.0, 50.0), Channel(120.0, 2.5, 60.0),
+                                   latch_delay=latch_delay, seed=1)
+        self.bus.attach(self.device, self.cs)
+        self.meter = Stpm34(self.bus, self.cs, latch_mode=latch_mode)
+
+    def counters(self):
+        return self.cs.windows, self.bus.bytes
+
+
+def measure(name, rig, op, iterations):
+    """Run op and return its per call cost"""
+    op()  # warm up caches and first-use tables
+    windows, nbytes = rig.counters()
+    start = time.perf_counter()
+    for _ in range(iterations):
+        op()
+    elapsed = time.perf_counter() - start
+    end_windows, end_bytes = rig.counters()
+
+    tracemalloc.start()
+    op()
+    base, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    before = tracemalloc.take_snapshot()
+    for _ in range(iterations):
+        op()
+    _, peak = tracemalloc.get_traced_memory()
+    after = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+    src = [tracemalloc.Filter(True, "*" + os.sep + "stpm34" + os.sep + "*")]
+    blocks = sum(stat.count_diff for stat in
+                 after.filter_traces(src).compare_to(before.filter_traces(src), "filename"))
+
+    return {
+        "name": name,
+        "frames": (end_windows - windows) / float(iterations),
+        "bytes": (end_bytes - nbytes) / float(iterations),
+        "time_us": elapsed * 1e6 / iterations,
+        "frames_per_s": (end_windows - windows) / elapsed if elapsed else 0.0,
+        "alloc_peak_bytes": max(peak - base, 0),
+        "alloc_live_blocks": blocks / float(iterations),
+    }
+
+
+def run(iterations, latch_delay):
+    results = []
+    rig = Rig(Stpm34.LATCH_SOFTWARE, latch_delay)
+    transport = rig.meter._transport
+    results.append(measure("transfer", rig,
+                           lambda: transport.transfer(0x48, 0xFF, 0xFF, 0xFF), iterations))
+    results.append(measure("latch[software]", rig, rig.meter.latch, iterations))
+    results.append(measure("read[software]", rig, rig.meter.read, iterations))
+    rig = Rig(Stpm34.LATCH_AUTO, latch_delay)
+    results.append(measure("read[auto]", rig, rig.meter.read, iterations))
+    regs = rig.meter.data_regs.list()
+    results.append(measure("read_registers[%d]" % len(regs), rig,
+                           lambda: rig.meter.read_registers(regs), iterations))
+    results.append(measure("apply_configs[noop]", rig, rig.meter.apply_configs, iterations))
+
+    dsp5 = rig.meter.ctrl_regs.dsp_ctrl_5
+
+    def retune():
+        dsp5.swell_thresh ^= 1
+        rig.meter.apply_configs()
+    results.append(measure("apply_configs[one field]", rig, retune, iterations))
+    results.append(measure("apply_configs[force]", rig,
+                           lambda: rig.meter.apply_configs(force=True), iterations))
+    results.append(measure("do_calibration", rig,
+                           lambda: rig.meter.do_calibration(230.0, 5.0), max(1, iterations // 50)))
+    return results
+
+
+def compare(results, baseline, threshold):
+    """Return the list of regressions against a baseline run"""
+    previous = dict((entry["name"], entry) for entry in baseline)
+    failures = []
+    for entry in results:
+        old = previous.get(entry["name"])
+        if old is None:
+            continue
+        for key in ("frames", "bytes"):
+            if entry[key] > old[key]:
+                failures.append("%s: %s %.1f > %.1f" % (entry["name"], key, entry[key], old[key]))
+        for key in ("time_us", "alloc_peak_bytes"):
+            if entry[key] > old[key] * (1.0 + threshold) and entry[key] - old[key] > 1:
+                failures.append("%s: %s %.1f > %.1f +%d%%" % (entry["name"], key, entry[key],
+                                                              old[key], threshold * 100))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("-n", "--iterations", type=int, default=200)
+    parser.add_argument("--latch-delay", type=float, default=0.0,
+                        help="seconds the simulated device takes to latch")
+    parser.add_argument("--json", help="write the results to this file")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="allowed relative increase in time and heap, default 0.10")
+    args = parser.parse_args(argv)
+    # Paths are relative to where the script was started, not the scratch
+    # directory below
+    if args.json:
+        args.json = os.path.abspath(args.json)
+    if args.baseline:
+        args.baseline = os.path.abspath(args.baseline)
+
+    # do_calibration writes cal.txt to the working directory
+    os.chdir(tempfile.mkdtemp())
+    stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        results = run(args.iterations, args.latch_delay)
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+
+    print("%-26s %8s %8s %10s %10s %10s %8s" % ("operation", "frames", "bytes", "time_us",
+                                                 "frames/s", "peak_B", "live"))
+    for entry in results:
+        print("%-26s %8.1f %8.1f %10.1f %10d %10d %8.2f" % (
+            entry["name"], entry["frames"], entry["bytes"], entry["time_us"],
+            entry["frames_per_s"], entry["alloc_peak_bytes"], entry["alloc_live_blocks"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            failures = compare(results, json.load(f), args.threshold)
+        for failure in failures:
+            print("REGRESSION " + failure)
+        return 1 if failures else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -21,20 +21,23 @@ furnished to do so, subject to the following conditions:
 """
 
 from machine import Pin, SPI
-from stpm34 import Stpm34
+from stpm34 import Stpm34, BusScheduler
 import time
 
 
 class Smartlet:
-    def __init__(self):
+    def __init__(self, tune_clock=False):
         self.spi = SPI(2, baudrate=200000, polarity=1, phase=1, bits=8, sck=Pin(18), mosi=Pin(23), miso=Pin(19))
         self.meter1 = Stpm34(self.spi, Pin(12, Pin.OUT, Pin.PULL_UP, value=1))
         self.meter2 = Stpm34(self.spi, Pin(13, Pin.OUT, Pin.PULL_UP, value=1))
+        self.meters = BusScheduler(self.spi, (self.meter1, self.meter2))
+        if tune_clock:
+            # Probes the bus up to the fastest of SPI_RATES
+            self.meters.tune_clock()
 
     def run(self):
         while True:
-            print("Meter 1: (V1, C1, V2, C2)")
-            print(self.meter1.read())
-            print("Meter 2: (V1, C1, V2, C2)")
-            print(self.meter2.read())
+            for i, sample in enumerate(self.meters.read_all()):
+                print("Meter {}: (V1, C1, V2, C2)".format(i + 1))
+                print(sample)
             time.sleep(1)
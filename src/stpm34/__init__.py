@@ -20,9 +20,15 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-__all__ = ["Stpm34", "CtrlRegs", "DataRegs", "Register", "Field"]
+__all__ = ["Stpm34", "BusScheduler", "SampleRing", "Snapshot", "EnergyAccumulator", "EventMonitor",
+           "CtrlRegs", "DataRegs", "Register", "Field"]
 
 from .stpm34 import Stpm34
+from .scheduler import BusScheduler
+from .ring import SampleRing
+from .snapshot import Snapshot
+from .energy import EnergyAccumulator
+from .events import EventMonitor
 from .regs import CtrlRegs, DataRegs
 from .register import Register
 from .field import Field
@@ -0,0 +1,140 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+try:
+    import uasyncio as asyncio
+except ImportError:
+    import asyncio
+
+from .register import Register
+from .util import ticks_us
+
+
+def sleep_ms(ms):
+    """Awaitable millisecond sleep for both uasyncio and CPython asyncio"""
+    if hasattr(asyncio, "sleep_ms"):
+        return asyncio.sleep_ms(ms)
+    return asyncio.sleep(ms / 1000.0)
+
+
+class AsyncStpm34(object):
+    """Coroutine API for an `stpm34.Stpm34`
+
+    Wraps a configured device and gives the event loop back while a latch
+    is pending and between the frames of a burst, so many meters and other
+    tasks can share one loop. Frames themselves are never split, so devices
+    on the same bus can be driven from different tasks; a per device lock
+    keeps two tasks from interleaving frames on the same device.
+
+    The wrapped device stays usable through its blocking methods, as long
+    as that is not done while one of its coroutines is running.
+
+    Parameters
+    ----------
+    device : :obj:`stpm34.Stpm34`
+        The device to drive
+
+    Examples
+    --------
+
+    meter = AsyncStpm34(Stpm34(spi, Pin(12, Pin.OUT, value=1)))
+
+    async def sample():
+        while True:
+            print(await meter.read())
+            await asyncio.sleep(1)
+    """
+
+    def __init__(self, device):
+        self.device = device
+        self._lock = None
+
+    @property
+    def lock(self):
+        """The per device lock, made on first use inside the running loop
+
+        asyncio before Python 3.10 and some uasyncio builds tie a Lock to
+        the loop that is current when it is made, which need not be the one
+        the coroutines end up running in.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        return self._lock
+
+    async def latch(self, ch1=True, ch2=True):
+        """Coroutine version of `Stpm34.latch()`"""
+        async with self.lock:
+            return await self._latch(ch1, ch2)
+
+    async def _latch(self, ch1, ch2):
+        device = self.device
+        start = ticks_us()
+        device.start_latch(ch1, ch2)
+        countdown = device.LATCH_POLLS
+        latched = True
+        while not device.poll_latch():
+            countdown -= 1
+            if countdown <= 0:
+                latched = False
+                break
+            await sleep_ms(1)
+        return device._latch_done(start, latched)
+
+    async def read_register(self, reg):
+        """Coroutine version of `Stpm34.read_register()`"""
+        async with self.lock:
+            if await self._read_registers((reg,)) is None:
+                return None
+        return reg
+
+    async def read_registers(self, regs):
+        """Coroutine version of `Stpm34.read_registers()`"""
+        async with self.lock:
+            return await self._read_registers(regs)
+
+    async def _read_registers(self, regs):
+        # Same frames as `Stpm34.read_registers()`, yielding between them
+        device = self.device
+        for reg in regs:
+            if not isinstance(reg, Register):
+                raise TypeError("Not a register I can read...")
+        valid = True
+        prev = None
+        for reg in regs:
+            valid = device._read_frame(prev, reg) and valid
+            prev = reg
+            await asyncio.sleep(0)
+        if prev is not None:
+            valid = device._read_frame(prev, None) and valid
+        return regs if valid else None
+
+    async def read(self, latch=True):
+        """Coroutine version of `Stpm34.read()`"""
+        device = self.device
+        async with self.lock:
+            start = ticks_us()
+            if latch and not await self._latch(True, True):
+                return None
+            data_regs = device.data_regs
+            if await self._read_registers((data_regs.dsp_reg14, data_regs.dsp_reg15)) is None:
+                return None
+            return device._read_done(start)
@@ -0,0 +1,215 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import math
+
+from .stats import FRAMES
+from .util import ticks_us, ticks_diff
+
+# Two sided normal quantiles for the confidence levels `Calibrator` accepts
+Z_SCORES = {0.9: 1.645, 0.95: 1.960, 0.99: 2.576, 0.999: 3.291}
+
+
+class RunningStats(object):
+    """Mean and variance of a stream of samples, updated in place (Welford)
+
+    Attributes
+    ----------
+    n : int
+        Samples seen
+    mean : float
+        Their mean
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.n = 0
+        self.mean = 0.0
+        self._m2 = 0.0
+
+    def add(self, x):
+        self.n += 1
+        delta = x - self.mean
+        self.mean += delta / self.n
+        self._m2 += delta * (x - self.mean)
+
+    def variance(self):
+        """Sample variance, 0 until there are two samples"""
+        if self.n < 2:
+            return 0.0
+        return self._m2 / (self.n - 1)
+
+    def half_width(self, z):
+        """Half width of the confidence interval of the mean for quantile z"""
+        if self.n < 2:
+            return float("inf")
+        return z * math.sqrt(self.variance() / self.n)
+
+
+class Calibrator(object):
+    """Works out CALV and CALI for both channels from a known load
+
+    Every sample latches once and reads the RMS registers of the channels
+    still being calibrated in one burst. The raw vrms and crms of each
+    channel feed a `RunningStats`, and a channel is done as soon as the
+    confidence interval of both its means is within ``tolerance`` of the
+    mean, so a quiet line finishes after ``min_samples`` and a noisy one
+    runs to at most ``max_samples``.
+
+    Parameters
+    ----------
+    device : :obj:`stpm34.Stpm34`
+        The device to calibrate
+    tolerance : float
+        Allowed relative half width of the confidence interval
+    confidence : float
+        Confidence level, one of the keys of `Z_SCORES`
+    min_samples : int
+        Samples always taken per channel
+    max_samples : int
+        Samples after which a channel is calibrated regardless
+
+    Attributes
+    ----------
+    stats : list
+        (vrms, crms) `RunningStats` per channel from the last run
+    samples : int
+        Latches taken by the last run
+    frames : int
+        Bus frames used by the last run
+    elapsed_us : int
+        Duration of the last run
+    kept : list of int
+        Channels the last run left at their old calibration, because they
+        could not be latched or read no load
+    """
+
+    def __init__(self, device, tolerance=0.0005, confidence=0.99, min_samples=8, max_samples=200):
+        self.device = device
+        self.tolerance = tolerance
+        self.z = Z_SCORES[confidence]
+        self.min_samples = min_samples
+        self.max_samples = max_samples
+        self.stats = [(RunningStats(), RunningStats()), (RunningStats(), RunningStats())]
+        self.samples = 0
+        self.frames = 0
+        self.elapsed_us = 0
+        self.kept = []
+
+    def _done(self, ch):
+        v, c = self.stats[ch - 1]
+        if v.n >= self.max_samples:
+            return True
+        if v.n < self.min_samples:
+            return False
+        tol = self.tolerance
+        return v.half_width(self.z) <= tol * v.mean and c.half_width(self.z) <= tol * c.mean
+
+    def measure(self, channels=(1, 2)):
+        """Sample the raw RMS values of the given channels until they settle
+
+        The device is switched to software latching for the duration, so
+        that every sample is a fresh measurement even in
+        `Stpm34.LATCH_AUTO` mode.
+
+        Returns
+        -------
+        list of tuple
+            (vrms, crms) mean raw values, per channel 1 and 2, None for a
+            channel that was not measured or never latched
+        """
+        device = self.device
+        start = ticks_us()
+        frames = device.stats.counters[FRAMES]
+        for pair in self.stats:
+            pair[0].reset()
+            pair[1].reset()
+        mode = device.latch_mode
+        if mode == device.LATCH_AUTO:
+            device.set_latch_mode(device.LATCH_SOFTWARE)
+        pending = [ch for ch in channels if not self._done(ch)]
+        samples = 0
+        attempts = 0
+        try:
+            while pending and attempts < self.max_samples:
+                attempts += 1
+                regs = [device._rms_regs[ch - 1] for ch in pending]
+                if not device.latch(1 in pending, 2 in pending):
+                    continue
+                if device.read_registers(regs) is None:
+                    continue
+                samples += 1
+                for ch, reg in zip(pending, regs):
+                    v, c = self.stats[ch - 1]
+                    v.add(reg.vrms)
+                    c.add(reg.crms)
+                pending = [ch for ch in pending if not self._done(ch)]
+        finally:
+            if mode == device.LATCH_AUTO:
+                device.set_latch_mode(mode)
+        self.samples = samples
+        self.frames = device.stats.counters[FRAMES] - frames
+        self.elapsed_us = ticks_diff(ticks_us(), start)
+        return [(v.mean, c.mean) if (ch + 1) in channels and v.n else None
+                for ch, (v, c) in enumerate(self.stats)]
+
+    def run(self, nom_voltage=120.0, nom_current=0.25, channels=(1, 2)):
+        """Measure a known load and work out calibration values
+
+        Channels not in ``channels``, that could not be latched or that read
+        zero voltage or current keep their current calibration; the last two
+        are listed in `Calibrator.kept`, and printed if the device is
+        verbose.
+
+        Returns
+        -------
+        tuple of int
+            (CALV1, CALI1, CALV2, CALI2)
+        """
+        device = self.device
+        regs = device.ctrl_regs
+        cal = [regs.dsp_ctrl_5.calibration, regs.dsp_ctrl_6.calibration,
+               regs.dsp_ctrl_7.calibration, regs.dsp_ctrl_8.calibration]
+        means = self.measure(channels)
+        self.kept = []
+        for ch in channels:
+            if means[ch - 1] is None:
+                self.kept.append(ch)
+                if device.verbose:
+                    print("Channel {} could not be latched, calibration kept".format(ch))
+                continue
+            i = (ch - 1) << 1
+            Av, Ai = means[ch - 1]
+            if not Av or not Ai:
+                self.kept.append(ch)
+                if device.verbose:
+                    print("Channel {} reads no load, calibration kept".format(ch))
+                continue
+            calv = (0.125 * (cal[i]/2048.0)) + 0.75
+            cali = (0.125 * (cal[i + 1]/2048.0)) + 0.75
+            Xv = nom_voltage * device.AV * calv * (2**15) / (device.Vref * (1 + (device.R1/device.R2)))
+            Xi = nom_current * device.AI * cali * device.ks * (2**17) / device.Vref
+            cal[i] = int((14336.0 * (Xv/Av)) - 12288.0)
+            cal[i + 1] = int((14336.0 * (Xi/Ai)) - 12288.0)
+        return tuple(cal)
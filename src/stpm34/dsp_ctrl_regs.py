@@ -20,10 +20,11 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-from .register import Register
+from .register import Register, layout
 from .field import Field
 
 
+@layout
 class CtrlDSP1_2(Register):
     """Control Register for DSP regs 1 and 2
 
@@ -96,79 +97,100 @@ class CtrlDSP1_2(Register):
     |         |                 |       sigma-delta bitstream              |         |
     +---------+-----------------+------------------------------------------+---------+
     """
+    __slots__ = ()
+    # ClearSS1 auto-resets to '0'
+    VOLATILE_MASK = 0x00000010
+    FIELDS = {
+        "clear_sag_swell_timeout": Field(0, 4),
+        "clear_sag_swell": Field(4),
+        "en_vref": Field(5),
+        "temp_comp": Field(6, 3),
+        "apparent_energy_mode": Field(17),
+        "apparent_vec_pow_mode": Field(18),
+        "bypass_HPF_volt": Field(19),
+        "bypass_HPF_current": Field(20),
+        "ROC_bypass": Field(21),
+        "LED_speed_drv": Field(24, 4),
+        "LED_pow_sel": Field(28, 2),
+        "LED_channel_sel": Field(30, 2)
+    }
+
     def __init__(self, address, value):
-        fields = {
-            "clear_sag_swell_timeout": Field(0, 4),
-            "clear_sag_swell": Field(4),
-            "en_vref": Field(5),
-            "temp_comp": Field(6, 3),
-            "apparent_energy_mode": Field(17),
-            "apparent_vec_pow_mode": Field(18),
-            "bypass_HPF_volt": Field(19),
-            "bypass_HPF_current": Field(20),
-            "ROC_bypass": Field(21),
-            "LED_speed_drv": Field(24, 4),
-            "LED_pow_sel": Field(28, 2),
-            "LED_channel_sel": Field(30, 2)
-        }
-        super(CtrlDSP1_2, self).__init__(address, value, fields)
+        super(CtrlDSP1_2, self).__init__(address, value)
 
 
+@layout
 class CtrlDSP3(Register):
+    __slots__ = ()
+    # software_reset and software_latch1/2 are cleared by the device
+    VOLATILE_MASK = 0x00700000
+    FIELDS = {
+        "clk_out_sel": Field(14, 2),
+        "clk_out_en": Field(16),
+        "tamper_tolerance": Field(17, 2),
+        "tamper_en": Field(19),
+        "software_reset": Field(20),
+        "software_latch1": Field(21),
+        "software_latch2": Field(22),
+        "software_auto_latch": Field(23),
+        "LED1_off": Field(24),
+        "LED2_off": Field(25),
+        "diff_energy_calc_en": Field(26),
+        "ref_freq": Field(27)
+    }
+
     def __init__(self, address=0x04, value=0x000004E0):
-        fields = {
-            "clk_out_sel": Field(14, 2),
-            "clk_out_en": Field(16),
-            "tamper_tolerance": Field(17, 2),
-            "tamper_en": Field(19),
-            "software_reset": Field(20),
-            "software_latch1": Field(21),
-            "software_latch2": Field(22),
-            "software_auto_latch": Field(23),
-            "LED1_off": Field(24),
-            "LED2_off": Field(25),
-            "diff_energy_calc_en": Field(26),
-            "ref_freq": Field(27)
-        }
-        super(CtrlDSP3, self).__init__(address, value, fields)
+        super(CtrlDSP3, self).__init__(address, value)
 
 
+@layout
 class CtrlDSP4(Register):
+    __slots__ = ()
+    FIELDS = {
+        "secondary_current_phase_comp": Field(0, 10),
+        "secondary_voltage_phase_comp": Field(10, 2),
+        "primary_current_phase_comp": Field(12, 10),
+        "primary_voltage_phase_comp": Field(22, 2)
+    }
+
     def __init__(self, address=0x06, value=0x00000000):
-        fields = {
-            "secondary_current_phase_comp": Field(0, 10),
-            "secondary_voltage_phase_comp": Field(10, 2),
-            "primary_current_phase_comp": Field(12, 10),
-            "primary_voltage_phase_comp": Field(22, 2)
-        }
-        super(CtrlDSP4, self).__init__(address, value, fields)
+        super(CtrlDSP4, self).__init__(address, value)
 
 
+@layout
 class CtrlDSP5__8(Register):
+    __slots__ = ()
+    FIELDS = {
+        "calibration": Field(0, 12),
+        "swell_thresh": Field(12, 10),
+        "sag_thresh": Field(22, 10)
+    }
+
     def __init__(self, address, value=0x003FF800):
-        fields = {
-            "calibration": Field(0, 12),
-            "swell_thresh": Field(12, 10),
-            "sag_thresh": Field(22, 10)
-        }
-        super(CtrlDSP5__8, self).__init__(address, value, fields)
+        super(CtrlDSP5__8, self).__init__(address, value)
 
 
+@layout
 class CtrlDSP9_11(Register):
+    __slots__ = ()
+    FIELDS = {
+        "ah_rms_upper_thresh": Field(0, 12),
+        "active_pow_offset": Field(12, 10),
+        "fundamental_pow_offset": Field(22, 10)
+    }
+
     def __init__(self, address, value=0x00000FFF):
-        fields = {
-            "ah_rms_upper_thresh": Field(0, 12),
-            "active_pow_offset": Field(12, 10),
-            "fundamental_pow_offset": Field(22, 10)
-        }
-        super(CtrlDSP9_11, self).__init__(address, value, fields)
+        super(CtrlDSP9_11, self).__init__(address, value)
 
 
+@layout
 class CtrlDSP10_12(Register):
+    __slots__ = ()
+    FIELDS = {
+        "ah_rms_lower_thresh": Field(0, 12),
+        "reactive_pow_offset": Field(12, 10),
+        "apparent_pow_offset": Field(22, 10)
+    }
+
     def __init__(self, address, value=0x00000FFF):
-        fields = {
-            "ah_rms_lower_thresh": Field(0, 12),
-            "reactive_pow_offset": Field(12, 10),
-            "apparent_pow_offset": Field(22, 10)
-        }
-        super(CtrlDSP10_12, self).__init__(address, value, fields)
+        super(CtrlDSP10_12, self).__init__(address, value)
@@ -20,64 +20,87 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-from .register import Register
+from .register import Register, layout
 from .field import Field
 
 
+@layout
 class DataDSP1(Register):
+    __slots__ = ()
+    FIELDS = {
+        "ch1_period": Field(0, 12),
+        "ch2_period": Field(16, 12)
+    }
+
     def __init__(self, address=0x2E):
-        fields = {
-            "ch1_period": Field(0, 12),
-            "ch2_period": Field(16, 12)
-        }
-        super(DataDSP1, self).__init__(address, 0, fields)
+        super(DataDSP1, self).__init__(address, 0)
 
 
+@layout
 class DataDSP2__9(Register):
+    __slots__ = ()
+    SIGNED = True
+    FIELDS = {
+        "data": Field(0, 24)
+    }
+
     def __init__(self, address):
-        fields = {
-            "data": Field(0, 24)
-        }
-        super(DataDSP2__9, self).__init__(address, 0, fields)
+        super(DataDSP2__9, self).__init__(address, 0)
 
 
+@layout
 class DataDSP14_15(Register):
+    __slots__ = ()
+    FIELDS = {
+        "vrms": Field(0, 15), "crms": Field(15, 17)
+    }
+
     def __init__(self, address):
-        fields = {
-            "vrms": Field(0, 15), "crms": Field(15, 17)
-        }
-        super(DataDSP14_15, self).__init__(address, 0, fields)
+        super(DataDSP14_15, self).__init__(address, 0)
 
 
+@layout
 class DataDSP16_18(Register):
+    __slots__ = ()
+    FIELDS = {
+        "swell_time": Field(0, 15),
+        "sag_time": Field(16, 15)
+    }
+
     def __init__(self, address):
-        fields = {
-            "swell_time": Field(0, 15),
-            "sag_time": Field(16, 15)
-        }
-        super(DataDSP16_18, self).__init__(address, 0, fields)
+        super(DataDSP16_18, self).__init__(address, 0)
 
 
+@layout
 class DataDSP17_19(Register):
+    __slots__ = ()
+    FIELDS = {
+        "swell_time": Field(0, 15),
+        "phase_angle": Field(16, 12)
+    }
+
     def __init__(self, address):
-        fields = {
-            "swell_time": Field(0, 15),
-            "phase_angle": Field(16, 12)
-        }
-        super(DataDSP17_19, self).__init__(address, 0, fields)
+        super(DataDSP17_19, self).__init__(address, 0)
 
 
+@layout
 class DataChReg(Register):
+    __slots__ = ()
+    SIGNED = True
+    FIELDS = {
+        "data": Field(0, 29)
+    }
+
     def __init__(self, address):
-        fields = {
-            "data": Field(0, 29)
-        }
-        super(DataChReg, self).__init__(address, 0, fields)
+        super(DataChReg, self).__init__(address, 0)
 
 
+@layout
 class Data32Reg(Register):
+    __slots__ = ()
+    FIELDS = {
+        "data": Field(0, 32)
+    }
+
     def __init__(self, address):
-        fields = {
-            "data": Field(0, 32)
-        }
-        super(Data32Reg, self).__init__(address, 0, fields)
+        super(Data32Reg, self).__init__(address, 0)
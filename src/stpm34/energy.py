@@ -0,0 +1,235 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from .util import ticks_diff
+
+# Rate at which the DSP integrates power into the energy rows, Hz. This is
+# the dclk of the energy LSB formula in the STPM32/STPM33/STPM34 datasheet:
+#   LSB [Wh] = Vref^2 (1 + R1/R2) / (3600 dclk ks kint Av Ai calV calI 2^17)
+# The power LSB has 2^28 in place of 3600 dclk 2^17.
+DCLK = 7812.5
+
+# Energy rows advance by this many LSBs per second for each LSB of the
+# matching power row, the ratio of the two LSBs above
+ENERGY_RATE = DCLK / 2048
+
+# Longest interval `EnergyAccumulator.max_poll_interval` will suggest, in s
+MAX_POLL_INTERVAL = 3600.0
+
+# The power row, per kind of energy, that drives it
+POWER_FOR = {
+    "active": "active_power",
+    "fundamental": "fundamental_power",
+    "reactive": "reactive_power",
+    "apparent": "apparent_rms_power",
+}
+
+
+class EnergyCounter(object):
+    """Unwraps one fixed width hardware energy counter into a Python int
+
+    Parameters
+    ----------
+    bits : int
+        Width of the counter on the device
+    total : int
+        Starting total in counter LSBs, e.g. from a checkpoint
+    """
+
+    def __init__(self, bits=32, total=0):
+        self.bits = bits
+        self.total = total
+        self.last = None
+
+    def update(self, raw, expected=None):
+        """Account for a new raw reading
+
+        Without a hint the change since the last reading is taken to be the
+        one closest to zero, which is right as long as the counter moved by
+        less than half its range. With ``expected``, the change predicted
+        from the power, the number of wraps is chosen to match it instead,
+        so polls can be missed as long as the power estimate is reasonable.
+
+        Returns
+        -------
+        int
+            The change that was added to the total
+        """
+        if self.last is None:
+            self.last = raw
+            return 0
+        span = 1 << self.bits
+        delta = (raw - self.last) % span
+        if expected is None:
+            if delta >= span >> 1:
+                delta -= span
+        else:
+            delta += int(round((expected - delta) / span)) * span
+        self.last = raw
+        self.total += delta
+        return delta
+
+
+class EnergyAccumulator(object):
+    """Billing grade energy totals from a device's energy counters
+
+    Each `EnergyAccumulator.poll()` latches once and reads the chosen energy
+    counters together with the power rows that drive them in one burst. The
+    power is used both to unwrap the counters across missed polls and to
+    work out how long the next poll can safely be put off.
+
+    Parameters
+    ----------
+    device : :obj:`stpm34.Stpm34`
+        The device to read
+    names : list of str
+        Energy rows of `stpm34.DataRegs` to accumulate, e.g.
+        ``"ph1_active_energy"`` or ``"tot_reactive_energy"``
+
+    Attributes
+    ----------
+    counters : dict
+        `EnergyCounter` by name
+    """
+
+    def __init__(self, device, names=("ph1_active_energy", "ph2_active_energy",
+                                       "tot_active_energy")):
+        self.device = device
+        self.names = tuple(names)
+        self.counters = {}
+        self._powers = {}
+        read = list(self.names)
+        for name in self.names:
+            self.counters[name] = EnergyCounter(32)
+            prefix, kind = name.split("_")[:2]
+            channels = ("ph1", "ph2") if prefix == "tot" else (prefix,)
+            powers = tuple(ch + "_" + POWER_FOR[kind] for ch in channels)
+            self._powers[name] = powers
+            for power in powers:
+                if power not in read:
+                    read.append(power)
+        self._read = read
+        self._power = {}
+        self._ticks = None
+
+    def poll(self):
+        """Read the counters and fold them into the totals
+
+        Returns
+        -------
+        float
+            Seconds until the next poll is due, see
+            `EnergyAccumulator.max_poll_interval()`, or None if the latch
+            timed out
+        """
+        snap = self.device.snapshot(self._read)
+        if snap is None:
+            return None
+        dt = None
+        if self._ticks is not None:
+            dt = ticks_diff(snap.ticks, self._ticks) / 1000.0
+        self._ticks = snap.ticks
+        for name in self.names:
+            power = 0
+            for row in self._powers[name]:
+                power += snap.value(row)
+            previous = self._power.get(name)
+            expected = None
+            if dt is not None and previous is not None:
+                expected = (previous + power) / 2.0 * dt * ENERGY_RATE
+            self.counters[name].update(snap.word(name), expected)
+            self._power[name] = power
+        return self.max_poll_interval()
+
+    def max_poll_interval(self, margin=0.5):
+        """Longest wait before the next poll that cannot lose a wrap
+
+        Parameters
+        ----------
+        margin : float
+            Fraction of half a counter range allowed to pass, so that power
+            changes between polls do not cause an ambiguous reading
+
+        Returns
+        -------
+        float
+            Seconds, capped at `MAX_POLL_INTERVAL`
+        """
+        fastest = 0
+        for power in self._power.values():
+            fastest = max(fastest, abs(power))
+        if not fastest:
+            return MAX_POLL_INTERVAL
+        return min(MAX_POLL_INTERVAL, (1 << 31) * margin / (fastest * ENERGY_RATE))
+
+    def energy_lsb(self, ch):
+        """Watt hours per LSB of the energy rows of a channel, 1 or 2
+
+        The datasheet formula above is the product of the channel's volts
+        and amps per LSB, `Stpm34.channel_scales()`, with the 2^15 2^17 of
+        their denominators swapped for 3600 dclk 2^17.
+        """
+        v_scale, c_scale = self.device.channel_scales(ch)
+        return v_scale * c_scale * (2**15) / (3600 * DCLK)
+
+    def wh(self, name):
+        """Accumulated energy of a per channel counter in watt hours
+
+        Totals (``tot_*``) sum both channels before scaling on the device,
+        so they are only available raw, through ``counters[name].total``.
+        """
+        if name.startswith("ph1_"):
+            return self.counters[name].total * self.energy_lsb(1)
+        if name.startswith("ph2_"):
+            return self.counters[name].total * self.energy_lsb(2)
+        raise ValueError("no single channel scale for " + name)
+
+    def save(self, path="energy.txt"):
+        """Write the totals to a checkpoint file"""
+        with open(path, 'w') as f:
+            for name in self.names:
+                f.write(name + ' ' + str(self.counters[name].total) + '\n')
+
+    def load(self, path="energy.txt"):
+        """Restore totals from a checkpoint file
+
+        The next poll only takes a baseline reading, since the device may
+        have been reset since the checkpoint was written.
+
+        Returns
+        -------
+        bool
+            False if there was no checkpoint to load
+        """
+        try:
+            with open(path, 'r') as f:
+                for line in f:
+                    parts = line.split()
+                    if len(parts) == 2 and parts[0] in self.counters:
+                        counter = self.counters[parts[0]]
+                        counter.total = int(parts[1])
+                        counter.last = None
+        except OSError:
+            return False
+        self._power = {}
+        self._ticks = None
+        return True
@@ -20,33 +20,36 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-from .register import Register
+from .register import Register, layout
 from .field import Field
 
 
+@layout
 class DataEVReg(Register):
+    __slots__ = ()
+    FIELDS = {
+        "ev_sign_tot_pow_a": Field(0),  # Sign of total active power
+        "ev_sign_tot_pow_r": Field(1),  # Sign of total reactive power
+        "ev_ovf_tot_pow_a": Field(2),  # total active power triggered threshold
+        "ev_ovf_tot_pow_r": Field(3),  # total reactive power triggered threshold
+        "ev_pow_sign_a": Field(4),  # Sign of channel active power
+        "ev_pow_sign_f": Field(5),  # Sign of channel fundamental power
+        "ev_pow_sign_r": Field(6),  # Sign of channel reactive power
+        "ev_pow_sign_s": Field(7),  # Sign of channel apparent power
+        "ev_energy_ovf_a": Field(8),  # channel active power triggered threshold
+        "ev_energy_ovf_f": Field(9),  # channel fundamental power triggered threshold
+        "ev_energy_ovf_r": Field(10),  # channel reactive power triggered threshold
+        "ev_energy_ovf_s": Field(11),  # channel apparent power triggered threshold
+        "ev_cur_zero_cross": Field(12),  # channel current crossed zero
+        "ev_cur_ADC_stuck": Field(13),  # channel current ADC stuck...
+        "ev_cur_AH_accum": Field(14),  # channel Amp Hour accumulation event occured
+        "ev_cur_swell_hist": Field(15, 4),  # channel current swell event history
+        "ev_volt_zero_cross": Field(19),  # channel voltage crossed zero
+        "ev_volt_ADC_stuck": Field(20),  # channel voltage ADC stuck...
+        "ev_volt_period_err": Field(21),  # channel voltage period error (out of range
+        "ev_volt_swell_hist": Field(22, 4),  # channel voltage swell event history
+        "ev_volt_sag_hist": Field(26, 4)  # channel voltage sag event history
+    }
+
     def __init__(self, address):
-        fields = {
-            "ev_sign_tot_pow_a": Field(0),  # Sign of total active power
-            "ev_sign_tot_pow_r": Field(1),  # Sign of total reactive power
-            "ev_ovf_tot_pow_a": Field(2),  # total active power triggered threshold
-            "ev_ovf_tot_pow_r": Field(3),  # total reactive power triggered threshold
-            "ev_pow_sign_a": Field(4),  # Sign of channel active power
-            "ev_pow_sign_f": Field(5),  # Sign of channel fundamental power
-            "ev_pow_sign_r": Field(6),  # Sign of channel reactive power
-            "ev_pow_sign_s": Field(7),  # Sign of channel apparent power
-            "ev_energy_ovf_a": Field(8),  # channel active power triggered threshold
-            "ev_energy_ovf_f": Field(9),  # channel fundamental power triggered threshold
-            "ev_energy_ovf_r": Field(10),  # channel reactive power triggered threshold
-            "ev_energy_ovf_s": Field(11),  # channel apparent power triggered threshold
-            "ev_cur_zero_cross": Field(12),  # channel current crossed zero
-            "ev_cur_ADC_stuck": Field(13),  # channel current ADC stuck...
-            "ev_cur_AH_accum": Field(14),  # channel Amp Hour accumulation event occured
-            "ev_cur_swell_hist": Field(15, 4),  # channel current swell event history
-            "ev_volt_zero_cross": Field(19),  # channel voltage crossed zero
-            "ev_volt_ADC_stuck": Field(20),  # channel voltage ADC stuck...
-            "ev_volt_period_err": Field(21),  # channel voltage period error (out of range
-            "ev_volt_swell_hist": Field(22, 4),  # channel voltage swell event history
-            "ev_volt_sag_hist": Field(26, 4)  # channel voltage sag event history
-        }
-        super(DataEVReg, self).__init__(address, 0, fields)
+        super(DataEVReg, self).__init__(address, 0)
@@ -0,0 +1,202 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from .stpm_ctrl_regs import CtrlIRQ, CtrlStatus
+from .util import ticks_ms
+
+# Addresses of the IRQ mask and status Registers of INT1, INT2 is 2 above
+DSP_IRQ1 = 0x1C
+DSP_SR1 = 0x20
+
+# Status bits worth an interrupt by default, the sign and overflow bits
+# follow every zero crossing of the power and are better polled
+POWER_QUALITY = ("current_adc_stuck", "current_swell_detect", "current_swell_end",
+                 "volt_adc_stuck", "volt_period_err", "volt_sag_detect", "volt_sag_end",
+                 "volt_swell_detect", "volt_swell_end", "tamper_on", "tamper_or_wrong_conn")
+
+# Status reads per `EventMonitor.check()`, in case events keep arriving
+MAX_PASSES = 4
+
+
+def event_mask(names):
+    """IRQ mask with the `CtrlIRQ` bits of the given field names set"""
+    mask = 0
+    for name in names:
+        mask |= 1 << CtrlIRQ.FIELDS[name]._pos
+    return mask
+
+
+class Event(object):
+    """One status bit that was found set
+
+    Attributes
+    ----------
+    ticks : int
+        ticks_ms() when the status was read
+    line : int
+        The interrupt line, 1 or 2, whose status register held it
+    kind : str
+        The `CtrlStatus` field name, e.g. ``"volt_sag_detect"``
+    """
+    __slots__ = ("ticks", "line", "kind")
+
+    def __init__(self, ticks, line, kind):
+        self.ticks = ticks
+        self.line = line
+        self.kind = kind
+
+    def __repr__(self):
+        return "Event({}, line {}, at {})".format(self.kind, self.line, self.ticks)
+
+
+class EventMonitor(object):
+    """Delivers power quality events when an INT pin of the device fires
+
+    The unmasked bits of `CtrlIRQ` drive the INT pin of the line. The pin
+    handler only sets a flag, so nothing touches the bus from interrupt
+    context; `EventMonitor.service()`, called from the main loop, reads
+    the status register only when the flag is set, clears the bits it
+    found by writing them back as 1 and hands out one `Event` per bit.
+
+    Parameters
+    ----------
+    device : :obj:`stpm34.Stpm34`
+        The device to watch
+    pin : machine.Pin
+        Input wired to the device's INT pin for the line, None to rely on
+        calling `EventMonitor.check()` instead
+    line : int
+        1 for DSP_IRQ1/DSP_SR1 and INT1, 2 for DSP_IRQ2/DSP_SR2 and INT2
+    names : list of str
+        `CtrlIRQ` fields to enable, `POWER_QUALITY` by default
+    callback : callable, optional
+        Called with each `Event`, otherwise events are queued for
+        `EventMonitor.get()`
+    queue_size : int
+        Events kept when there is no callback, the oldest are dropped and
+        counted in `EventMonitor.dropped`
+    trigger : int, optional
+        Pin edge that signals an event, the falling edge by default
+
+    Examples
+    --------
+
+    monitor = EventMonitor(meter, Pin(4, Pin.IN, Pin.PULL_UP))
+    while True:
+        monitor.service()
+        event = monitor.get()
+        if event is not None:
+            print(event)
+    """
+
+    def __init__(self, device, pin=None, line=1, names=POWER_QUALITY, callback=None,
+                 queue_size=32, trigger=None):
+        self.device = device
+        self.pin = pin
+        self.line = line
+        self.mask = event_mask(names)
+        self.callback = callback
+        self.queue_size = queue_size
+        self.events = []
+        self.dropped = 0
+        self.irq = CtrlIRQ(DSP_IRQ1 + 2 * (line - 1))
+        self.status = CtrlStatus(DSP_SR1 + 2 * (line - 1))
+        self._pending = False
+        # The handler goes on first, an event between the first check and
+        # attaching it would hold the line down with its edge missed
+        if pin is not None:
+            if trigger is None:
+                trigger = pin.IRQ_FALLING
+            pin.irq(handler=self._handler, trigger=trigger)
+        self.irq.from_uint32(self.mask)
+        device.write_register(self.irq)
+        # Anything already latched in the status would hold the line down
+        # without another edge, so start from a clean status
+        self.check()
+
+    def _handler(self, pin):
+        # Runs in interrupt context, must not allocate or touch the bus
+        self._pending = True
+
+    def disable(self):
+        """Mask every event and release the pin"""
+        if self.pin is not None:
+            self.pin.irq(handler=None)
+        self.irq.from_uint32(0)
+        self.device.write_register(self.irq)
+        self._pending = False
+
+    def service(self):
+        """Read and clear the status if the INT pin has fired since last time
+
+        Returns
+        -------
+        int
+            The number of events delivered
+        """
+        if not self._pending:
+            return 0
+        self._pending = False
+        return self.check()
+
+    def check(self):
+        """Read and clear the status whether or not the pin has fired
+
+        Returns
+        -------
+        int
+            The number of events delivered
+        """
+        device = self.device
+        status = self.status
+        count = 0
+        for _ in range(MAX_PASSES):
+            if device.read_register(status) is None:
+                # Try again on the next service
+                self._pending = True
+                break
+            bits = status.to_uint32() & self.mask
+            if not bits:
+                break
+            status.from_uint32(bits)
+            device.write_register(status)
+            ticks = ticks_ms()
+            for name, shift in zip(CtrlStatus.NAMES, CtrlStatus.SHIFTS):
+                if (bits >> shift) & 1:
+                    self._deliver(Event(ticks, self.line, name))
+                    count += 1
+        return count
+
+    def _deliver(self, event):
+        if self.callback is not None:
+            self.callback(event)
+            return
+        if len(self.events) >= self.queue_size:
+            self.events.pop(0)
+            self.dropped += 1
+        self.events.append(event)
+
+    def get(self):
+        """The oldest queued `Event`, or None"""
+        if self.events:
+            return self.events.pop(0)
+        return None
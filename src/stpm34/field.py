@@ -23,26 +23,68 @@ furnished to do so, subject to the following conditions:
 
 
 class Field(object):
+    """A bit field of a `stpm34.Register`
+
+    Fields are declared once per Register class, in its ``FIELDS`` dict, and
+    read or write their bits straight out of the Register's 32-bit word::
+
+        reg.crc_en = 1
+        poly = reg.crc_poly
+
+    A Field that is not part of a Register keeps a value of its own in
+    ``val``, which is where ``value`` goes.
+    """
+
     def __init__(self, position=0, length=1, value=0):
         self._pos = position
+        self._len = length
         self._val_mask = (2**length) - 1
+        self._clear = 0xFFFFFFFF ^ (self._val_mask << position)
         self.val = value
 
     @property
     def val(self):
-        return self._val & self._val_mask
+        return self._val
 
     @val.setter
     def val(self, value):
         if value is not None:
             self._val = value & self._val_mask
 
-
     @property
     def offset_val(self):
-        return self.val << self._pos
+        return self._val << self._pos
 
     @offset_val.setter
     def offset_val(self, value):
         if value is not None:
             self.val = value >> self._pos
+
+    def __get__(self, reg, cls=None):
+        if reg is None:
+            return self
+        return (reg._word >> self._pos) & self._val_mask
+
+    def __set__(self, reg, value):
+        if value is not None:
+            reg._word = (reg._word & self._clear) | ((value & self._val_mask) << self._pos)
+
+
+class BoundField(object):
+    """A Field of one Register, for the ``reg.fields["name"].val`` spelling"""
+
+    def __init__(self, reg, field):
+        self._reg = reg
+        self._field = field
+
+    @property
+    def val(self):
+        return self._field.__get__(self._reg)
+
+    @val.setter
+    def val(self, value):
+        self._field.__set__(self._reg, value)
+
+    @property
+    def offset_val(self):
+        return self.val << self._field._pos
@@ -0,0 +1,80 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from .util import crc8_table
+
+
+class Framing(object):
+    """How frames are put on the wire, compiled from `CtrlUART1`
+
+    A Framing never changes once built; the driver swaps in a new one when
+    it writes or reads the UART/SPI control register, so sending a frame
+    costs no register or field lookups.
+
+    Attributes
+    ----------
+    crc_en : bool
+        Frames carry a trailing CRC byte
+    size : int
+        Length of one frame in bytes, 5 with CRC and 4 without
+    poly : int
+        CRC polynomial
+    lsb_first : bool
+        The CRC is computed over bit reversed bytes
+    table : bytearray
+        CRC lookup table for ``poly`` and ``lsb_first``, None without CRC
+    """
+
+    def __init__(self, crc_en=True, poly=0x07, lsb_first=False):
+        self.crc_en = crc_en
+        self.size = 5 if crc_en else 4
+        self.poly = poly
+        self.lsb_first = lsb_first
+        self.table = crc8_table(poly, lsb_first) if crc_en else None
+
+    @classmethod
+    def from_register(cls, uart_ctrl_1):
+        """Build the Framing described by a `CtrlUART1` Register"""
+        return cls(uart_ctrl_1.crc_en == 1, uart_ctrl_1.crc_poly,
+                   uart_ctrl_1.lsb_first == 1)
+
+    def checksum(self, packet):
+        """CRC of the four data bytes at the start of packet"""
+        table = self.table
+        _sum = table[packet[0]]
+        _sum = table[_sum ^ packet[1]]
+        _sum = table[_sum ^ packet[2]]
+        return table[_sum ^ packet[3]]
+
+    def fill(self, buf, read_address, write_address, lsbyte, msbyte):
+        """Write one outgoing frame into the start of buf, in place"""
+        buf[0] = read_address
+        buf[1] = write_address
+        buf[2] = lsbyte
+        buf[3] = msbyte
+        table = self.table
+        if table is not None:
+            buf[4] = table[table[table[table[read_address] ^ write_address] ^ lsbyte] ^ msbyte]
+
+    def check(self, packet):
+        """True if the CRC byte of a received frame matches its data"""
+        return self.checksum(packet) == packet[4]
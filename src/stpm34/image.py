@@ -0,0 +1,95 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+try:
+    import ubinascii as binascii
+except ImportError:
+    import binascii
+import struct
+
+# File header: magic, format version, number of register entries
+MAGIC = b"STPM"
+VERSION = 1
+HEADER = "<4sBB"
+HEADER_SIZE = struct.calcsize(HEADER)
+# One register: its address and 32-bit word
+ENTRY = "<BI"
+ENTRY_SIZE = struct.calcsize(ENTRY)
+# CRC-32 of everything before it
+TRAILER = "<I"
+TRAILER_SIZE = struct.calcsize(TRAILER)
+
+
+def encode(words):
+    """Pack register words into an image
+
+    The calibration travels in the words of `CtrlDSP5__8` like every other
+    control setting, so restoring the image restores it too.
+
+    Parameters
+    ----------
+    words : list of tuple
+        (address, word) per register
+
+    Returns
+    -------
+    bytes
+        The image, ready to write to a file
+    """
+    data = bytearray(struct.pack(HEADER, MAGIC, VERSION, len(words)))
+    for address, word in words:
+        data.extend(struct.pack(ENTRY, address, word & 0xFFFFFFFF))
+    data.extend(struct.pack(TRAILER, binascii.crc32(data) & 0xFFFFFFFF))
+    return bytes(data)
+
+
+def decode(data):
+    """Unpack an image made by `encode`
+
+    Returns
+    -------
+    list of tuple
+        (address, word) per register
+
+    Raises
+    ------
+    ValueError
+        If the image is truncated, from another format version or fails
+        its CRC
+    """
+    if len(data) < HEADER_SIZE + TRAILER_SIZE:
+        raise ValueError("image truncated")
+    magic, version, count = struct.unpack_from(HEADER, data, 0)
+    if magic != MAGIC:
+        raise ValueError("not a register image")
+    if version != VERSION:
+        raise ValueError("unsupported image version {}".format(version))
+    end = HEADER_SIZE + count * ENTRY_SIZE
+    if len(data) != end + TRAILER_SIZE:
+        raise ValueError("image truncated")
+    crc = struct.unpack_from(TRAILER, data, end)[0]
+    if crc != binascii.crc32(data[:end]) & 0xFFFFFFFF:
+        raise ValueError("image CRC mismatch")
+    words = []
+    for offset in range(HEADER_SIZE, end, ENTRY_SIZE):
+        words.append(struct.unpack_from(ENTRY, data, offset))
+    return words
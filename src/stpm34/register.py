@@ -20,39 +20,130 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-from .field import Field
+from .field import BoundField, Field
+
+
+def layout(cls):
+    """Compile the ``FIELDS`` of a Register class into its class level layout
+
+    Every Field becomes a class attribute under its name, and the names,
+    shifts and masks are also kept as tuples ordered by bit position.
+    """
+    fields = cls.FIELDS
+    names = sorted(fields, key=lambda name: fields[name]._pos)
+    mask = 0
+    for name in names:
+        field = fields[name]
+        setattr(cls, name, field)
+        mask |= field._val_mask << field._pos
+    cls.NAMES = tuple(names)
+    cls.SHIFTS = tuple(fields[name]._pos for name in names)
+    cls.MASKS = tuple(fields[name]._val_mask for name in names)
+    cls.FIELD_MASK = mask
+    cls.STABLE_MASK = mask & ~cls.VOLATILE_MASK & 0xFFFFFFFF
+    return cls
+
+
+class FieldMap(object):
+    """Read-only mapping of field name to `stpm34.field.BoundField`"""
+
+    def __init__(self, reg):
+        self._reg = reg
+
+    def __getitem__(self, name):
+        return BoundField(self._reg, self._reg.FIELDS[name])
+
+    def __contains__(self, name):
+        return name in self._reg.FIELDS
+
+    def __iter__(self):
+        return iter(self._reg.NAMES)
+
+    def __len__(self):
+        return len(self._reg.NAMES)
+
+    def keys(self):
+        return self._reg.NAMES
+
+    def values(self):
+        return [self[name] for name in self._reg.NAMES]
+
+    def items(self):
+        return [(name, self[name]) for name in self._reg.NAMES]
+
 
 class Register(object):
+    """A 32-bit device register held as a single word
+
+    Subclasses list their fields in ``FIELDS`` and are decorated with
+    `stpm34.register.layout`, which makes each field an attribute that
+    shifts and masks the word in place.
+
+    A Register can also be made at run time from a dict of `stpm34.Field`'s,
+    ``Register(address, value, fields)``, which lays out a subclass for it.
+    The subclass is made once per set of fields and shared by every
+    Register with the same ones. Anything other than a dict gives a
+    Register without fields, as it always has.
+    """
+    __slots__ = ("address", "_word")
+    FIELDS = {}
+    NAMES = ()
+    SHIFTS = ()
+    MASKS = ()
+    # Bits that are commands rather than state: the device clears them by
+    # itself, so they never compare equal to what was written
+    VOLATILE_MASK = 0x00000000
+    # Fields are two's complement numbers
+    SIGNED = False
+    # Bits covered by a Field, and of those the ones that read back as written
+    FIELD_MASK = 0x00000000
+    STABLE_MASK = 0x00000000
+
+    def __new__(cls, *args, **kwargs):
+        fields = kwargs.get("fields", args[2] if len(args) > 2 else None)
+        if cls is Register and isinstance(fields, dict) and fields:
+            cls = _runtime_layout(fields)
+        return object.__new__(cls)
+
     def __init__(self, address, value=0, fields=None):
         self.address = address
-        self._valid_fields = True
-        if fields is not None and isinstance(fields, dict):
-            for field in fields.values():
-                if not isinstance(field, Field):
-                    self._valid_fields = False
-                    print("Field dict contains non-Field")
-            if self._valid_fields:
-                self.fields = fields
-                self.from_uint32(value)
-        else:
-            self._valid_fields = False
-            self.fields = {}
+        self._word = value & 0xFFFFFFFF
+
+    @property
+    def fields(self):
+        return FieldMap(self)
 
     def from_uint32(self, value):
-        for field in self.fields.values():
-            field.offset_val = value
+        self._word = value & 0xFFFFFFFF
 
     def to_uint32(self):
-        result = 0
-        for field in self.fields.values():
-            result |= field.offset_val
-        return result
+        return self._word
 
     def to_bytes(self):
-        i = self.to_uint32()
+        i = self._word
         b = bytearray(4)
         b[0] = (i >> 0) & 0xFF
         b[1] = (i >> 8) & 0xFF
         b[2] = (i >> 16) & 0xFF
         b[3] = (i >> 24) & 0xFF
         return bytes(b)
+
+
+# Register subclasses laid out at run time, by their fields' names and bits
+_layouts = {}
+
+
+def _runtime_layout(fields):
+    # The laid out Register subclass for a FIELDS dict given at run time
+    valid = {}
+    for name, field in fields.items():
+        if isinstance(field, Field):
+            valid[name] = field
+        else:
+            print("Field dict contains non-Field")
+    key = tuple(sorted((name, field._pos, field._len) for name, field in valid.items()))
+    cls = _layouts.get(key)
+    if cls is None:
+        cls = layout(type("Register", (Register,), {"__slots__": (), "FIELDS": valid}))
+        _layouts[key] = cls
+    return cls
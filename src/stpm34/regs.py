@@ -52,15 +52,52 @@ class CtrlRegs(object):
         return self._list
 
 class DataRegs(object):
+    """Every data register of the device, in address order"""
+
     def __init__(self):
         self._list = []
-        self.dsp_reg14 = DataDSP14_15(0x48)
-        self._list.append(self.dsp_reg14)
-        self.dsp_reg15 = DataDSP14_15(0x4a)
-        self._list.append(self.dsp_reg15)
+        self._names = []
+        self._add("dsp_ev1", DataEVReg(0x2A))
+        self._add("dsp_ev2", DataEVReg(0x2C))
+        self._add("dsp_reg1", DataDSP1(0x2E))
+        for i in range(2, 10):
+            # V1, C1, V2, C2 data then V1, C1, V2, C2 fundamental
+            self._add("dsp_reg{}".format(i), DataDSP2__9(0x30 + 2 * (i - 2)))
+        self._add("dsp_reg14", DataDSP14_15(0x48))
+        self._add("dsp_reg15", DataDSP14_15(0x4A))
+        self._add("dsp_reg16", DataDSP16_18(0x4C))
+        self._add("dsp_reg17", DataDSP17_19(0x4E))
+        self._add("dsp_reg18", DataDSP16_18(0x50))
+        self._add("dsp_reg19", DataDSP17_19(0x52))
+        for ch, base in ((1, 0x54), (2, 0x6C)):
+            prefix = "ph{}_".format(ch)
+            self._add(prefix + "active_energy", Data32Reg(base))
+            self._add(prefix + "fundamental_energy", Data32Reg(base + 0x02))
+            self._add(prefix + "reactive_energy", Data32Reg(base + 0x04))
+            self._add(prefix + "apparent_energy", Data32Reg(base + 0x06))
+            self._add(prefix + "active_power", DataChReg(base + 0x08))
+            self._add(prefix + "fundamental_power", DataChReg(base + 0x0A))
+            self._add(prefix + "reactive_power", DataChReg(base + 0x0C))
+            self._add(prefix + "apparent_rms_power", DataChReg(base + 0x0E))
+            self._add(prefix + "apparent_vec_power", DataChReg(base + 0x10))
+            self._add(prefix + "momentary_active_power", DataChReg(base + 0x12))
+            self._add(prefix + "momentary_fundamental_power", DataChReg(base + 0x14))
+            self._add(prefix + "ah_acc", Data32Reg(base + 0x16))
+        self._add("tot_active_energy", Data32Reg(0x84))
+        self._add("tot_fundamental_energy", Data32Reg(0x86))
+        self._add("tot_reactive_energy", Data32Reg(0x88))
+        self._add("tot_apparent_energy", Data32Reg(0x8A))
+
+    def _add(self, name, reg):
+        setattr(self, name, reg)
+        self._list.append(reg)
+        self._names.append(name)
 
     def len(self):
         return len(self._list)
 
     def list(self):
         return self._list
+
+    def names(self):
+        return self._names
@@ -0,0 +1,116 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from array import array
+
+
+class SampleRing(object):
+    """Fixed size ring of raw RMS samples
+
+    Holds, per sample, a ticks_ms timestamp and the raw `DataDSP14_15`
+    word of each channel in three preallocated ``array('I')``'s. Appending
+    is integer only and never allocates; when the ring is full the oldest
+    sample is overwritten and counted in `SampleRing.overruns`.
+
+    Parameters
+    ----------
+    capacity : int
+        Number of samples the ring holds
+
+    Examples
+    --------
+
+    ring = SampleRing(512)
+    while True:
+        meter.sample(ring)
+        if len(ring) >= 100:
+            publish(ring.drain(meter.convert_rms))
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.ticks = array('I', [0] * capacity)
+        self.ch1 = array('I', [0] * capacity)
+        self.ch2 = array('I', [0] * capacity)
+        self.overruns = 0
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def append(self, ticks, ch1, ch2):
+        """Store one sample, dropping the oldest if the ring is full"""
+        head = self._head
+        self.ticks[head] = ticks
+        self.ch1[head] = ch1
+        self.ch2[head] = ch2
+        head += 1
+        if head == self.capacity:
+            head = 0
+        self._head = head
+        if self._count < self.capacity:
+            self._count += 1
+        else:
+            self.overruns += 1
+
+    def clear(self):
+        self._head = 0
+        self._count = 0
+
+    def drain_raw(self, n=None):
+        """Remove up to n samples, oldest first, as (ticks, ch1, ch2) tuples"""
+        count = self._count if n is None else min(n, self._count)
+        start = self._head - self._count
+        if start < 0:
+            start += self.capacity
+        out = []
+        for k in range(count):
+            i = start + k
+            if i >= self.capacity:
+                i -= self.capacity
+            out.append((self.ticks[i], self.ch1[i], self.ch2[i]))
+        self._count -= count
+        return out
+
+    def drain(self, convert, n=None):
+        """Remove up to n samples, oldest first, converted to engineering units
+
+        Parameters
+        ----------
+        convert : callable
+            ``convert(ch, word) -> (volts, amps)``, normally
+            `Stpm34.convert_rms` of the device that filled the ring
+        n : int, optional
+            Most samples to remove, all of them by default
+
+        Returns
+        -------
+        list of tuple
+            (ticks, V1, C1, V2, C2) per sample
+        """
+        out = []
+        for ticks, ch1, ch2 in self.drain_raw(n):
+            v1, c1 = convert(1, ch1)
+            v2, c2 = convert(2, ch2)
+            out.append((ticks, v1, c1, v2, c2))
+        return out
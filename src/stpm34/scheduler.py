@@ -0,0 +1,156 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from .stats import LATCH_TIMEOUTS
+from .util import sleep_ms
+
+# SPI clocks `BusScheduler.tune_clock()` steps through, slowest first
+SPI_RATES = (200000, 500000, 1000000, 2000000, 4000000, 6000000, 8000000, 10000000)
+
+
+class BusScheduler(object):
+    """Reads many `stpm34.Stpm34` devices that share one bus
+
+    Instead of latching and reading each device in turn, every device is
+    asked to latch first and the devices are then harvested round robin as
+    their latches complete, so one device's latch time is spent moving
+    another device's data.
+
+    Parameters
+    ----------
+    bus : machine.SPI
+        The bus shared by all of the devices
+    devices : list of :obj:`stpm34.Stpm34`, optional
+        Devices to start with, more can be added with `BusScheduler.add()`
+
+    Attributes
+    ----------
+    baudrate : int
+        Bus clock chosen by `BusScheduler.tune_clock()`, None until tuned
+    link_errors : list of tuple
+        (clock, bad replies) for every clock the last tuning tried
+
+    Examples
+    --------
+
+    spi = SPI(2, baudrate=200000, polarity=1, phase=1)
+    sched = BusScheduler(spi)
+    for pin in (12, 13, 14):
+        sched.add(Stpm34(spi, Pin(pin, Pin.OUT, value=1)))
+    sched.tune_clock()
+    print(sched.read_all())
+    """
+
+    def __init__(self, bus, devices=()):
+        self.bus = bus
+        self.devices = []
+        self.baudrate = None
+        self.link_errors = []
+        for device in devices:
+            self.add(device)
+
+    def add(self, device):
+        """Add a device, which must be on this scheduler's bus"""
+        if device.bus is not self.bus:
+            raise ValueError("device is not on this bus")
+        self.devices.append(device)
+        return device
+
+    def read_all(self):
+        """Latch and read every device
+
+        Each device is read as soon as its own latch has completed, while
+        the others are still being polled.
+
+        Returns
+        -------
+        list of tuple
+            Per device, in order, the (V1, C1, V2, C2) of `Stpm34.read()`,
+            or None if the device did not latch in time or could not be read
+        """
+        devices = self.devices
+        results = [None] * len(devices)
+        for device in devices:
+            device.start_latch()
+        pending = list(range(len(devices)))
+        countdown = devices[0].LATCH_POLLS if devices else 0
+        while pending:
+            for i in pending[:]:
+                if devices[i].poll_latch():
+                    results[i] = devices[i].read(latch=False)
+                    pending.remove(i)
+            if pending:
+                countdown -= 1
+                if countdown <= 0:
+                    for i in pending:
+                        devices[i].stats.counters[LATCH_TIMEOUTS] += 1
+                    break
+                sleep_ms(1)
+        return results
+
+    def tune_clock(self, rates=SPI_RATES, frames=64, margin=1):
+        """Run the bus at the fastest clock every device reads cleanly at
+
+        The clock is stepped up through rates and every device reads
+        ``frames`` known registers at each step, see
+        `Stpm34.qualify_link()`. Stepping stops at the first clock with any
+        bad reply, or at the last of rates, and the bus settles ``margin``
+        steps below the fastest clean clock, so a board that only just
+        passes is not run at its limit. The slowest clean clock is kept
+        though. Devices with the CRC off cannot be qualified, and the bus
+        is then left at the slowest of rates.
+
+        Parameters
+        ----------
+        rates : list of int
+            Clocks to try, slowest first
+        frames : int
+            Replies checked per device per clock
+        margin : int
+            Clean clocks to back off by
+
+        Returns
+        -------
+        int
+            The clock the bus is left at, None if even the slowest failed or
+            a device has the CRC off
+        """
+        self.link_errors = []
+        clean = []
+        for rate in rates:
+            self.bus.init(baudrate=rate)
+            errors = 0
+            for device in self.devices:
+                n = device.qualify_link(frames)
+                if n is None:
+                    self.baudrate = None
+                    self.bus.init(baudrate=rates[0])
+                    return None
+                errors += n
+            self.link_errors.append((rate, errors))
+            if errors:
+                break
+            clean.append(rate)
+        clean = clean[:max(1, len(clean) - margin)]
+        self.baudrate = clean[-1] if clean else None
+        self.bus.init(baudrate=self.baudrate if clean else rates[0])
+        return self.baudrate
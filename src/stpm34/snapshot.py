@@ -0,0 +1,96 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from array import array
+
+
+def sign_extend(value, bits):
+    """Interpret the low bits of value as a two's complement number"""
+    sign = 1 << (bits - 1)
+    value &= (sign << 1) - 1
+    return value - (sign << 1) if value & sign else value
+
+
+class Snapshot(object):
+    """Data registers read from one latch, kept as raw words
+
+    Parameters
+    ----------
+    ticks : int
+        ticks_ms when the registers were read
+    names : list of str
+        `stpm34.DataRegs` attribute names, in the order of regs
+    regs : list of :obj:`stpm34.Register`
+        The Registers just read
+
+    Attributes
+    ----------
+    ticks : int
+        ticks_ms when the registers were read
+    names : tuple of str
+        Names of the registers held
+    words : array
+        Their 32-bit values, in the same order
+    """
+
+    def __init__(self, ticks, names, regs):
+        self.ticks = ticks
+        self.names = tuple(names)
+        self.words = array('I', [reg.to_uint32() for reg in regs])
+        self._types = tuple(type(reg) for reg in regs)
+
+    def __len__(self):
+        return len(self.names)
+
+    def __contains__(self, name):
+        return name in self.names
+
+    def word(self, name):
+        """The raw value of a register"""
+        return self.words[self.names.index(name)]
+
+    def value(self, name, field=None):
+        """One field of a register, or its only field if there is just one
+
+        Fields that are two's complement on the device (powers, and the
+        instantaneous data of `DataDSP2__9`) are returned signed.
+        """
+        i = self.names.index(name)
+        cls = self._types[i]
+        if field is None:
+            field = cls.NAMES[0]
+        f = cls.FIELDS[field]
+        raw = (self.words[i] >> f._pos) & f._val_mask
+        if cls.SIGNED:
+            raw = sign_extend(raw, f._len)
+        return raw
+
+    def as_dict(self):
+        """Every register as {name: {field: value}}"""
+        result = {}
+        for i in range(len(self.names)):
+            cls = self._types[i]
+            fields = {}
+            for field in cls.NAMES:
+                fields[field] = self.value(self.names[i], field)
+            result[self.names[i]] = fields
+        return result
@@ -0,0 +1,113 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from array import array
+
+# Counter indices into `Stats.counters`
+FRAMES = 0          # frames exchanged with the device
+BYTES = 1           # bytes clocked out (and in) for those frames
+CRC_ERRORS = 2      # replies whose CRC did not match
+SHORT_FRAMES = 3    # replies shorter than the frame
+LATCH_POLLS = 4     # reads of CtrlDSP3 while waiting for a software latch
+LATCH_TIMEOUTS = 5  # latches the device never confirmed
+VERIFY_ERRORS = 6   # registers that read back different from what was written
+READS = 7           # completed `Stpm34.read()` calls
+RETRIES = 8         # registers read again after a bad reply
+RECOVERED = 9       # of those, the ones a retry got a good reply for
+INVALID = 10        # registers given up on once every retry had failed
+LINK_LOST = 11      # baud rate changes the device could not be brought back from
+N_COUNTERS = 12
+
+COUNTER_NAMES = ("frames", "bytes", "crc_errors", "short_frames", "latch_polls",
+                 "latch_timeouts", "verify_errors", "reads", "retries", "recovered",
+                 "invalid", "link_lost")
+
+# Upper edges of the latency histogram buckets in microseconds, the last
+# bucket takes everything above the final edge
+BUCKET_EDGES = (250, 500, 1000, 2000, 4000, 8000, 16000, 32000, 64000, 128000, 256000)
+N_BUCKETS = len(BUCKET_EDGES) + 1
+
+
+class Stats(object):
+    """Per device counters and latency histograms
+
+    Everything lives in preallocated integer arrays, so recording costs an
+    index and an add and never formats or allocates; turning the numbers
+    into text is left to `Stats.as_dict()` and `Stats.summary()`.
+
+    Counters are ``array('L')`` items, at least 32 bits wide. MicroPython
+    truncates a store past the top, so a counter wraps to 0; CPython raises
+    OverflowError instead. At 10000 frames a second a 32-bit frame count
+    lasts about five days, so long running code should work with
+    differences between readings and call `Stats.reset()` now and then.
+
+    Attributes
+    ----------
+    counters : array
+        Event counts, indexed by the constants of this module
+    read_hist : array
+        Latency of `Stpm34.read()` per bucket of `BUCKET_EDGES`
+    latch_hist : array
+        Latency of `Stpm34.latch()` per bucket of `BUCKET_EDGES`
+    """
+
+    def __init__(self):
+        self.counters = array('L', [0] * N_COUNTERS)
+        self.read_hist = array('L', [0] * N_BUCKETS)
+        self.latch_hist = array('L', [0] * N_BUCKETS)
+
+    def reset(self):
+        for hist in (self.counters, self.read_hist, self.latch_hist):
+            for i in range(len(hist)):
+                hist[i] = 0
+
+    @staticmethod
+    def record(hist, us):
+        """Count one latency of us microseconds in a histogram"""
+        i = 0
+        for edge in BUCKET_EDGES:
+            if us < edge:
+                break
+            i += 1
+        hist[i] += 1
+
+    def as_dict(self):
+        result = {}
+        for i in range(N_COUNTERS):
+            result[COUNTER_NAMES[i]] = self.counters[i]
+        result["read_hist"] = list(self.read_hist)
+        result["latch_hist"] = list(self.latch_hist)
+        return result
+
+    def summary(self):
+        lines = []
+        for i in range(N_COUNTERS):
+            lines.append("{}: {}".format(COUNTER_NAMES[i], self.counters[i]))
+        for name, hist in (("read", self.read_hist), ("latch", self.latch_hist)):
+            buckets = []
+            for i in range(N_BUCKETS):
+                if hist[i]:
+                    edge = BUCKET_EDGES[i] if i < len(BUCKET_EDGES) else None
+                    buckets.append("<{}us:{}".format(edge, hist[i]) if edge else ">={}us:{}".format(
+                        BUCKET_EDGES[-1], hist[i]))
+            lines.append("{} latency: {}".format(name, " ".join(buckets) or "-"))
+        return "\n".join(lines)
@@ -20,10 +20,43 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-from .util import bitwise_reverse, crc8
+from .calibrate import Calibrator
+from .framing import Framing
+from . import image
 from .register import Register
+from .transport import SpiTransport, UartTransport
+from .uart_ctrl_regs import CtrlUART2
 from .regs import CtrlRegs, DataRegs
-import time
+from .snapshot import Snapshot
+from .stats import Stats, LATCH_POLLS, LATCH_TIMEOUTS, VERIFY_ERRORS, READS, RETRIES, \
+                   RECOVERED, INVALID, LINK_LOST
+from .util import sleep_ms, ticks_ms, ticks_us, ticks_diff
+
+# Address of the register that sets the frame format, see `CtrlUART1`
+UART_CTRL_1 = 0x24
+# Clock the UART baud divider of `CtrlUART2` counts in, Hz
+UART_CLOCK = 16000000
+# Rates `Stpm34.upgrade_baudrate()` tries, fastest first
+UART_RATES = (460800, 230400, 115200, 57600, 19200)
+# The device's rate after reset
+UART_DEFAULT = 9600
+# First data register, everything from here on is a measurement
+DATA_FIRST = 0x2A
+# Addresses of the calibration registers, `CtrlDSP5__8`
+CAL_FIRST = 0x08
+CAL_LAST = 0x0E
+# software_latch1/2 in `CtrlDSP3`
+LATCH1 = 0x00200000
+LATCH2 = 0x00400000
+
+
+def _divider_rate(baud):
+    # Baud rate a CtrlUART2 divider runs at, snapped to a standard rate
+    rate = UART_CLOCK / float(baud or 1)
+    for std in UART_RATES + (UART_DEFAULT,):
+        if abs(rate - std) <= 0.02 * std:
+            return std
+    return int(round(rate))
 
 
 class Stpm34(object):
@@ -31,8 +64,26 @@ class Stpm34(object):
 
     Parameters
     ----------
-    uart : machine.UART
-        The uart on which the device is communicating.
+    bus : machine.SPI or machine.UART
+        The bus on which the device is communicating
+    cs : machine.Pin
+        The device's SPI chip select, None when ``bus`` is a UART
+    syn : machine.Pin, optional
+        Output wired to the device's SYN pin, enables `Stpm34.LATCH_SYN`
+    latch_mode : int, optional
+        One of `Stpm34.LATCH_AUTO`, `Stpm34.LATCH_SYN` or
+        `Stpm34.LATCH_SOFTWARE`. Defaults to the cheapest one available,
+        see `Stpm34.set_latch_mode()`.
+    image : str, optional
+        Path of a `Stpm34.save_image()` file to configure the device from,
+        instead of the built in defaults, if it is usable
+    verbose : bool
+        Print the registers as they are read, and why a fallback was taken
+        or a write did not verify; otherwise these only show in the return
+        values and `Stpm34.stats`. Default: False
+    baudrate : int
+        Rate ``bus`` was opened at when it is a UART, Default: 9600, the
+        device's rate after reset
 
     Attributes
     ----------
@@ -47,12 +98,25 @@ class Stpm34(object):
         An object containing all of the data `stpm34.Register`'s. This object
         is filled when you call `Stpm34.read()`. You should not write any of
         these Registers.
+    stats : :obj:`stpm34.stats.Stats`
+        Frame, error and latch counters plus read/latch latency histograms.
+        `Stats.summary()` formats them.
+    retries : int
+        Times a register is read again after a short or corrupt reply,
+        Default: `Stpm34.RETRIES`
+    strict : bool
+        Raise OSError for a register that could not be read, instead of
+        flagging the read as invalid by returning None, Default: False
 
     Examples
     --------
 
-    uart = UART(0, 9600) # STPM34 defaults to 9600 baud
-    stpm = stpm34.Stpm34(uart)
+    spi = SPI(1, 200000, polarity=1, phase=1)
+    stpm = stpm34.Stpm34(spi, Pin(12, Pin.OUT, value=1))
+
+    uart = UART(1, 9600, timeout=10) # STPM34 defaults to 9600 baud
+    stpm = stpm34.Stpm34(uart, None)
+    stpm.upgrade_baudrate()
     """
 
     # Pre defined parameters to the hardware
@@ -64,28 +128,91 @@ class Stpm34(object):
     AV=2.0
     AI=2.0
 
-    def __init__(self, bus, cs):
+    # How measurements get latched into the data registers, cheapest first
+    LATCH_AUTO = 0      # the device latches continuously by itself
+    LATCH_SYN = 1       # a pulse on the SYN pin latches both channels
+    LATCH_SOFTWARE = 2  # software_latch1/2 written, then polled until clear
+    # Polls of CtrlDSP3, 1 ms apart, before a software latch is given up on
+    LATCH_POLLS = 300
+    # Reads of a register after a bad reply before it is given up on
+    RETRIES = 2
+
+    def __init__(self, bus, cs=None, syn=None, latch_mode=None, image=None, verbose=False,
+                 baudrate=UART_DEFAULT):
         self.bus = bus
         self.cs = cs
+        self.syn = syn
+        self.verbose = verbose
+        self.retries = self.RETRIES
+        self.strict = False
+        self.latch_mode = self.LATCH_SOFTWARE
+        self._latch_pending = 0
+        self.stats = Stats()
+        # Volts/amps per LSB as (V1, C1, V2, C2), None until worked out
+        self._scales = None
 
         self.ctrl_regs = CtrlRegs()
         self.data_regs = DataRegs()
         self._read_ctrl_regs = CtrlRegs()
+        # Last word seen on (or written to) the device, by register address
+        self._shadow = {}
+        framing = Framing.from_register(self._read_ctrl_regs.uart_ctrl_1)
+        if cs is None:
+            self._transport = UartTransport(bus, framing, self.stats, baudrate)
+        else:
+            self._transport = SpiTransport(bus, cs, framing, self.stats)
+        # Baud rate and frame delay, only touched by `Stpm34.set_baudrate()`
+        self._uart_ctrl_2 = CtrlUART2()
+        self._rms_regs = (self.data_regs.dsp_reg14, self.data_regs.dsp_reg15)
 
-        print("Before changing registers")
+        # Warm start: one read burst, then only what differs gets written
         self.read_configs()
-        self.ctrl_regs.dsp_ctrl_3.fields["ref_freq"].val = 1
-        self.write_register(self.ctrl_regs.dsp_ctrl_3)
-        self.ctrl_regs.dfe_ctrl_1.fields["gain"].val = 0
-        self.write_register(self.ctrl_regs.dfe_ctrl_1)
-        print("After changing registers")
+        if image is None or not self._image_into_regs(image):
+            self.ctrl_regs.dsp_ctrl_3.ref_freq = 1
+            self.ctrl_regs.dfe_ctrl_1.gain = 0
+        self.latch_mode = self._latch_bits(latch_mode)
         self.apply_configs()
         #if not self.read_calibration():
         #    self.do_calibration()
 
+    def set_latch_mode(self, mode=None):
+        """Choose how `Stpm34.latch()` gets a measurement into the data registers
 
-    def latch(self, ch1=True, ch2=True):
-        """Latches a measurement so that the registers can be read in from the device
+        `Stpm34.LATCH_AUTO` sets software_auto_latch once, after which the
+        data registers are read directly with no per sample handshake.
+        `Stpm34.LATCH_SYN` pulses the SYN pin, which costs no bus frames.
+        `Stpm34.LATCH_SOFTWARE` is the write-and-poll handshake on
+        `CtrlDSP3`.
+
+        Parameters
+        ----------
+        mode : int
+            The latch mode, None picks the cheapest, `Stpm34.LATCH_AUTO`
+        """
+        mode = self._latch_bits(mode)
+        self.write_register(self.ctrl_regs.dsp_ctrl_3)
+        self.latch_mode = mode
+        return mode
+
+    def _latch_bits(self, mode):
+        # Set up CtrlDSP3 for a latch mode without writing it
+        if mode is None:
+            mode = self.LATCH_AUTO
+        if mode == self.LATCH_SYN and self.syn is None:
+            if self.verbose:
+                print("No SYN pin given, latching in software")
+            mode = self.LATCH_SOFTWARE
+        dsp3 = self.ctrl_regs.dsp_ctrl_3
+        dsp3.software_auto_latch = 1 if mode == self.LATCH_AUTO else 0
+        dsp3.software_latch1 = 0
+        dsp3.software_latch2 = 0
+        return mode
+
+    def start_latch(self, ch1=True, ch2=True):
+        """Ask the device to latch a measurement without waiting for it
+
+        Completion is checked with `Stpm34.poll_latch()`, which leaves the
+        bus free for other devices in between, see `stpm34.BusScheduler`.
 
         Parameters
         ----------
@@ -94,102 +221,308 @@ class Stpm34(object):
         ch2 : bool
             Set channel 2 latch, Default: True
         """
+        mode = self.latch_mode
+        if mode == self.LATCH_AUTO:
+            self._latch_pending = 0
+            return
+        if mode == self.LATCH_SYN:
+            # SCS is held high between frames, so a SYN pulse latches
+            syn = self.syn
+            syn.value(0)
+            syn.value(1)
+            self._latch_pending = 0
+            return
         dsp3 = self.ctrl_regs.dsp_ctrl_3
+        pending = 0
         if ch1:
-            dsp3.fields["software_latch1"].val = 1
+            dsp3.software_latch1 = 1
+            pending |= LATCH1
         if ch2:
-            dsp3.fields["software_latch2"].val = 1
+            dsp3.software_latch2 = 1
+            pending |= LATCH2
         self.write_register(dsp3)
-        ch1_latched = False
-        ch2_latched = False
-        latched = False
+        self._latch_pending = pending
+
+    def poll_latch(self):
+        """Check once whether the latch from `Stpm34.start_latch()` is done
+
+        Returns
+        -------
+        bool
+            True once the device has cleared every requested latch bit
+        """
+        if not self._latch_pending:
+            return True
         dsp3 = self._read_ctrl_regs.dsp_ctrl_3
-        countdown = 300
-        while (not latched) and (countdown > 0):
-            self.read_register(dsp3)
-            if ch1 and dsp3.fields["software_latch1"].val == 0:
-                ch1_latched = True
-            if ch2 and dsp3.fields["software_latch2"].val == 0:
-                ch2_latched = True
-            latched = (not ch1 or ch1_latched) and (not ch2 or ch2_latched)
-            if latched:
-                break
-            time.sleep_ms(1)
+        self.stats.counters[LATCH_POLLS] += 1
+        if self.read_register(dsp3) is None:
+            return False
+        self._latch_pending &= dsp3.to_uint32()
+        return not self._latch_pending
+
+    def latch(self, ch1=True, ch2=True):
+        """Latches a measurement so that the registers can be read in from the device
+
+        In `Stpm34.LATCH_AUTO` mode there is nothing to do, and the SYN pin
+        always latches both channels.
+
+        Parameters
+        ----------
+        ch1 : bool
+            Set channel 1 latch, Default: True
+        ch2 : bool
+            Set channel 2 latch, Default: True
+
+        Returns
+        -------
+        bool
+            False if the device did not confirm the latch in time
+        """
+        start = ticks_us()
+        self.start_latch(ch1, ch2)
+        countdown = self.LATCH_POLLS
+        latched = True
+        while not self.poll_latch():
             countdown -= 1
+            if countdown <= 0:
+                latched = False
+                break
+            sleep_ms(1)
+        return self._latch_done(start, latched)
+
+    def _latch_done(self, start, latched):
+        # Book a finished latch, started at ticks_us() start, in the stats
+        stats = self.stats
+        if not latched:
+            stats.counters[LATCH_TIMEOUTS] += 1
+        stats.record(stats.latch_hist, ticks_diff(ticks_us(), start))
+        return latched
+
+    def read(self, latch=True):
+        """Read the RMS voltage and current of both channels
+
+        Parameters
+        ----------
+        latch : bool
+            Latch a new measurement first. Pass False when the latch has
+            already been done, e.g. by a `stpm34.BusScheduler`.
 
-    def read(self):
-        self.latch()
+        Returns
+        -------
+        tuple of float
+            (V1, C1, V2, C2), or None if the latch was not confirmed or the
+            data registers could not be read
+        """
+        start = ticks_us()
+        if latch and not self.latch():
+            return None
+        if self.read_registers(self._rms_regs) is None:
+            return None
+        return self._read_done(start)
 
-        ch1_v, ch1_c = self.read_ch1_rms()
-        ch2_v, ch2_c = self.read_ch2_rms()
+    def _read_done(self, start):
+        # Convert the RMS registers just read and book the read in the stats
+        regs = self._rms_regs
+        ch1_v, ch1_c = self.convert_rms(1, regs[0].to_uint32())
+        ch2_v, ch2_c = self.convert_rms(2, regs[1].to_uint32())
 
+        stats = self.stats
+        stats.counters[READS] += 1
+        stats.record(stats.read_hist, ticks_diff(ticks_us(), start))
         return ch1_v, ch1_c, ch2_v, ch2_c
 
-    def do_calibration(self, nom_voltage=120.0, nom_current=0.25):
-        print(nom_voltage, nom_current)
-        n_samples = 200
+    def do_calibration(self, nom_voltage=120.0, nom_current=0.25, channels=(1, 2),
+                       tolerance=0.0005, max_samples=200):
+        """Calibrate against a known load and store the result
 
-        CALV1 = self.ctrl_regs.dsp_ctrl_5.fields["calibration"].val
-        CALI1 = self.ctrl_regs.dsp_ctrl_6.fields["calibration"].val
-        calv1 = (0.125 * (CALV1/2048)) + 0.75
-        cali1 = (0.125 * (CALI1/2048)) + 0.75
-        Xv = nom_voltage * self.AV * calv1 * (2**15) / (self.Vref * (1 + (self.R1/self.R2)))
-        Xi = nom_current * self.AI * cali1 * self.ks * (2**17) / self.Vref
+        Sampling stops per channel once the mean is known to within
+        ``tolerance``, see `stpm34.calibrate.Calibrator`.
 
-        v2_sum = 0
-        c1_sum = 0
-        for _ in range(n_samples):
-            ch1_reg = self.read_register(self.data_regs.dsp_reg14)
-            ch1_current = ch1_reg.fields["crms"].val
-            c1_sum += ch1_current
+        Parameters
+        ----------
+        nom_voltage : float
+            The RMS voltage applied
+        nom_current : float
+            The RMS current drawn
+        channels : tuple of int
+            The channels carrying the load, the others keep their calibration
+        tolerance : float
+            Relative precision to reach on every measured mean
+        max_samples : int
+            Upper bound on the samples taken
 
-            ch2_reg = self.read_register(self.data_regs.dsp_reg15)
-            ch2_voltage = ch2_reg.fields["vrms"].val
-            v2_sum += ch2_voltage
+        Returns
+        -------
+        :obj:`stpm34.calibrate.Calibrator`
+            With the sample count, frames and time the run took, and the
+            channels that kept their old calibration
+        """
+        calibrator = Calibrator(self, tolerance=tolerance, max_samples=max_samples)
+        self.write_calibration(*calibrator.run(nom_voltage, nom_current, channels))
+        if self.verbose:
+            print("Calibrated in {} samples, {} frames, {} ms".format(
+                calibrator.samples, calibrator.frames, calibrator.elapsed_us // 1000))
+        return calibrator
 
-        Av = v2_sum / n_samples
-        Ai = c1_sum / n_samples
+    def read_rms(self, ch, refresh=True):
+        """Read the RMS voltage and current of one channel
 
-        CALV = (14336.0 * (Xv/Av)) - 12288.0
-        CALI = (14336.0 * (Xi/Ai)) - 12288.0
+        Parameters
+        ----------
+        ch : int
+            The channel, 1 or 2
+        refresh : bool
+            Read the data register from the device first, otherwise convert
+            what the last read left in it
+
+        Returns
+        -------
+        tuple of float
+            (voltage, current), or None if the register could not be read
+        """
+        reg = self._rms_regs[ch - 1]
+        if refresh and self.read_register(reg) is None:
+            return None
+        return self.convert_rms(ch, reg.to_uint32())
 
-        self.write_calibration(int(CALV), int(CALI), int(CALV), int(CALI))
+    def read_ch1_rms(self, refresh=True):
+        return self.read_rms(1, refresh)
 
-    def read_ch1_rms(self):
-        # Channel 1
-        CALV = self.ctrl_regs.dsp_ctrl_5.fields["calibration"].val
-        CALI = self.ctrl_regs.dsp_ctrl_6.fields["calibration"].val
-        reg = self.data_regs.dsp_reg14
-        self.read_register(reg)
+    def read_ch2_rms(self, refresh=True):
+        return self.read_rms(2, refresh)
 
+    def rms_scales(self, CALV, CALI):
+        """Volts and amps per LSB of vrms and crms for given CALV and CALI"""
         calv = (0.125 * (CALV/2048.0)) + 0.75
         cali = (0.125 * (CALI/2048.0)) + 0.75
-        v_reg = reg.fields["vrms"].val
-        c_reg = reg.fields["crms"].val
-
         # using Vref,R1,R2,ks,calv,Av calculate voltage
-        voltage = (v_reg * self.Vref * (1+(self.R1/self.R2))) / (calv * self.AV * (2**15))
-        current = (c_reg * self.Vref) / (cali * self.AI * (2**17) * self.ks * self.kint)
+        v_scale = (self.Vref * (1+(self.R1/self.R2))) / (calv * self.AV * (2**15))
+        c_scale = self.Vref / (cali * self.AI * (2**17) * self.ks * self.kint)
+        return v_scale, c_scale
+
+    def channel_scales(self, ch):
+        """Volts and amps per LSB of a channel's vrms and crms, 1 or 2
 
-        return voltage, current
+        From `Stpm34.rms_scales()` and the calibration registers, cached as
+        for `Stpm34.convert_rms()`. Every other scale of the channel, power
+        or energy, is a multiple of these.
+        """
+        scales = self._scales
+        if scales is None:
+            scales = self._update_scales()
+        i = (ch - 1) << 1
+        return scales[i], scales[i + 1]
 
-    def read_ch2_rms(self):
-        # Channel 2
-        CALV = self.ctrl_regs.dsp_ctrl_7.fields["calibration"].val
-        CALI = self.ctrl_regs.dsp_ctrl_8.fields["calibration"].val
-        reg = self.data_regs.dsp_reg15
-        self.read_register(reg)
+    def _update_scales(self):
+        regs = self.ctrl_regs
+        v1, c1 = self.rms_scales(regs.dsp_ctrl_5.calibration, regs.dsp_ctrl_6.calibration)
+        v2, c2 = self.rms_scales(regs.dsp_ctrl_7.calibration, regs.dsp_ctrl_8.calibration)
+        self._scales = (v1, c1, v2, c2)
+        return self._scales
 
-        calv = (0.125 * (CALV/2048.0)) + 0.75
-        cali = (0.125 * (CALI/2048.0)) + 0.75
-        v_reg = reg.fields["vrms"].val
-        c_reg = reg.fields["crms"].val
+    def convert_rms(self, ch, word):
+        """Convert a raw `DataDSP14_15` word to volts and amps
 
-        # using Vref,R1,R2,ks,calv,Av calculate voltage
-        voltage = (v_reg * self.Vref * (1+(self.R1/self.R2))) / (calv * self.AV * (2**15))
-        current = (c_reg * self.Vref) / (cali * self.AI * (2**17) * self.ks * self.kint)
+        The per channel scale factors are worked out once from the
+        calibration registers and kept until one of `CtrlDSP5__8` is written
+        or read again.
 
-        return voltage, current
+        Parameters
+        ----------
+        ch : int
+            The channel the word was read from, 1 or 2
+        word : int
+            The 32-bit register value
+
+        Returns
+        -------
+        tuple of float
+            (voltage, current)
+        """
+        scales = self._scales
+        if scales is None:
+            scales = self._update_scales()
+        i = (ch - 1) << 1
+        # vrms is bits [14:0], crms bits [31:15]
+        return (word & 0x7FFF) * scales[i], (word >> 15) * scales[i + 1]
+
+    def snapshot(self, names=None, latch=True):
+        """Latch once and read a set of data registers in one burst
+
+        The registers are read in address order in a single pipelined sweep
+        after one latch, so everything in the snapshot comes from the same
+        measurement. In `Stpm34.LATCH_AUTO` mode the device would keep
+        latching during the sweep, so auto latch is switched off for it:
+        the frame that clears software_auto_latch also requests the latch,
+        and one more frame turns auto latch back on afterwards. With
+        ``latch=False`` in that mode the rows are read as they are and may
+        come from different latches.
+
+        Parameters
+        ----------
+        names : list of str, optional
+            `stpm34.DataRegs` attribute names, e.g. ``["dsp_reg1",
+            "ph1_active_power"]``. Every data register by default.
+        latch : bool
+            Latch a new measurement first
+
+        Returns
+        -------
+        :obj:`stpm34.Snapshot`
+            The raw words, or None if the latch timed out or a register
+            could not be read
+        """
+        data_regs = self.data_regs
+        if names is None:
+            names = data_regs.names()
+            regs = data_regs.list()
+        else:
+            regs = [getattr(data_regs, name) for name in names]
+            order = sorted(range(len(regs)), key=lambda i: regs[i].address)
+            names = [names[i] for i in order]
+            regs = [regs[i] for i in order]
+        if not latch:
+            if self.read_registers(regs) is None:
+                return None
+            return Snapshot(ticks_ms(), names, regs)
+        mode = self.latch_mode
+        if mode == self.LATCH_AUTO:
+            self.ctrl_regs.dsp_ctrl_3.software_auto_latch = 0
+            self.latch_mode = self.LATCH_SOFTWARE
+        try:
+            if not self.latch() or self.read_registers(regs) is None:
+                return None
+            return Snapshot(ticks_ms(), names, regs)
+        finally:
+            if mode == self.LATCH_AUTO:
+                self.set_latch_mode(mode)
+
+    def sample(self, ring, latch=True):
+        """Latch and append one raw sample to a ring buffer
+
+        Only integers are handled, conversion to volts and amps is left to
+        whoever drains the ring, see `stpm34.SampleRing.drain()`.
+
+        Parameters
+        ----------
+        ring : :obj:`stpm34.SampleRing`
+            Where the sample goes
+        latch : bool
+            Latch a new measurement first
+
+        Returns
+        -------
+        bool
+            False if the latch timed out or the registers could not be read,
+            and nothing was stored
+        """
+        if latch and not self.latch():
+            return False
+        regs = self._rms_regs
+        if self.read_registers(regs) is None:
+            return False
+        ring.append(ticks_ms(), regs[0].to_uint32(), regs[1].to_uint32())
+        return True
 
     def read_calibration(self):
         try:
@@ -199,10 +532,10 @@ class Stpm34(object):
                 CHV2 = int(f.readline()[:-1])
                 CHC2 = int(f.readline()[:-1])
 
-                self.ctrl_regs.dsp_ctrl_5.fields["calibration"].val = CHV1
-                self.ctrl_regs.dsp_ctrl_6.fields["calibration"].val = CHC1
-                self.ctrl_regs.dsp_ctrl_7.fields["calibration"].val = CHV2
-                self.ctrl_regs.dsp_ctrl_8.fields["calibration"].val = CHC2
+                self.ctrl_regs.dsp_ctrl_5.calibration = CHV1
+                self.ctrl_regs.dsp_ctrl_6.calibration = CHC1
+                self.ctrl_regs.dsp_ctrl_7.calibration = CHV2
+                self.ctrl_regs.dsp_ctrl_8.calibration = CHC2
 
                 self.write_register(self.ctrl_regs.dsp_ctrl_5)
                 self.write_register(self.ctrl_regs.dsp_ctrl_6)
@@ -214,10 +547,10 @@ class Stpm34(object):
         return True
 
     def write_calibration(self, CHV1, CHC1, CHV2, CHC2):
-        self.ctrl_regs.dsp_ctrl_5.fields["calibration"].val = CHV1
-        self.ctrl_regs.dsp_ctrl_6.fields["calibration"].val = CHC1
-        self.ctrl_regs.dsp_ctrl_7.fields["calibration"].val = CHV2
-        self.ctrl_regs.dsp_ctrl_8.fields["calibration"].val = CHC2
+        self.ctrl_regs.dsp_ctrl_5.calibration = CHV1
+        self.ctrl_regs.dsp_ctrl_6.calibration = CHC1
+        self.ctrl_regs.dsp_ctrl_7.calibration = CHV2
+        self.ctrl_regs.dsp_ctrl_8.calibration = CHC2
 
         self.write_register(self.ctrl_regs.dsp_ctrl_5)
         self.write_register(self.ctrl_regs.dsp_ctrl_6)
@@ -230,19 +563,224 @@ class Stpm34(object):
             f.write(str(CHV2) + '\n')
             f.write(str(CHC2) + '\n')
 
+    def save_image(self, path="config.bin"):
+        """Save the device's control registers, calibration included, to a file
+
+        The words come from the shadow copy of the device where it has one,
+        so the image holds what the device was last seen to run with
+        rather than pending edits to `Stpm34.ctrl_regs`.
+        """
+        shadow = self._shadow
+        words = []
+        for reg in self.ctrl_regs.list():
+            words.append((reg.address, shadow.get(reg.address, reg.to_uint32())))
+        with open(path, 'wb') as f:
+            f.write(image.encode(words))
+
+    def load_image(self, path="config.bin"):
+        """Restore the control registers from a file made by `Stpm34.save_image()`
+
+        The words go into `Stpm34.ctrl_regs` and are applied with
+        `Stpm34.apply_configs()`, so everything that differs from the device
+        is written in one back to back burst and verified with one read
+        burst. A missing or corrupt image leaves the device alone.
+
+        Returns
+        -------
+        bool
+            False if there was no usable image, in which case the caller
+            should fall back to `Stpm34.read_calibration()` or
+            `Stpm34.do_calibration()`
+        """
+        if not self._image_into_regs(path):
+            return False
+        self.apply_configs()
+        return True
+
+    def _image_into_regs(self, path):
+        try:
+            with open(path, 'rb') as f:
+                words = image.decode(f.read())
+        except OSError:
+            if self.verbose:
+                print("no config image, try if you must...")
+            return False
+        except ValueError as e:
+            if self.verbose:
+                print("config image unusable: {}".format(e))
+            return False
+        by_address = {}
+        for reg in self.ctrl_regs.list():
+            by_address[reg.address] = reg
+        for address, word in words:
+            reg = by_address.get(address)
+            if reg is not None:
+                reg.from_uint32(word)
+        return True
+
+    def qualify_link(self, frames=64):
+        """Count bad replies over a burst of reads of known registers
+
+        The control registers are read back to back, round and round, and
+        every reply has to pass its CRC and match the shadow copy of the
+        device in its stable bits. Registers not in the shadow copy yet are
+        read with `Stpm34.read_configs()` first, at whatever rate the bus
+        runs now. With the CRC off a corrupt reply can pass as good data,
+        so the link is not qualified at all.
+
+        Parameters
+        ----------
+        frames : int
+            Replies to check
+
+        Returns
+        -------
+        int
+            Replies that were short, failed their CRC or held the wrong data,
+            None if the CRC is off
+        """
+        if not self._transport.framing.crc_en:
+            if self.verbose:
+                print("CRC is off, the link cannot be qualified")
+            return None
+        regs = self.ctrl_regs.list()
+        shadow = self._shadow
+        for reg in regs:
+            if reg.address not in shadow:
+                self.read_configs()
+                break
+        transport = self._transport
+        errors = 0
+        prev = regs[-1]
+        transport.transfer(prev.address, 0xFF, 0xFF, 0xFF)
+        for i in range(frames):
+            reg = regs[i % len(regs)]
+            ok = transport.transfer(reg.address, 0xFF, 0xFF, 0xFF)
+            expected = shadow.get(prev.address)
+            if not ok or expected is None or (transport.word() ^ expected) & prev.STABLE_MASK:
+                errors += 1
+            prev = reg
+        return errors
+
+    def set_baudrate(self, baudrate, frame_delay=None, checks=8):
+        """Move the device and the host UART to a new baud rate
+
+        The new divider goes out at the old rate, the host follows, and
+        ``checks`` reads of `CtrlUART2` have to come back intact for the
+        rate to be kept. Otherwise the old divider is written back and the
+        host returns to the old rate, the one the divider read back at the
+        start says the link was running at. If the device does not answer
+        there either it is counted in ``stats`` as link_lost.
+
+        Parameters
+        ----------
+        baudrate : int
+            The rate to switch to
+        frame_delay : int, optional
+            New frame_delay of `CtrlUART2`, unchanged if None
+        checks : int
+            Frames that must pass at the new rate
+
+        Returns
+        -------
+        bool
+            True if the link works at the new rate, False if it does not or
+            the device is not on a UART
+        """
+        transport = self._transport
+        if not isinstance(transport, UartTransport):
+            return False
+        reg = self._uart_ctrl_2
+        if self.read_register(reg) is None:
+            return False
+        old_word = reg.to_uint32()
+        # The read just worked, so the divider is the rate the link runs at,
+        # whatever the host was told
+        old_rate = _divider_rate(reg.baud)
+        transport.baudrate = old_rate
+        reg.baud = int(round(UART_CLOCK / float(baudrate)))
+        if frame_delay is not None:
+            reg.frame_delay = frame_delay
+        word = reg.to_uint32()
+        self.write_register(reg)
+        transport.set_baudrate(baudrate)
+        if self._check_link(reg.address, word, checks):
+            return True
+        # Best effort, the device may not have understood the new rate at all
+        reg.from_uint32(old_word)
+        self.write_register(reg, force=True)
+        transport.set_baudrate(old_rate)
+        if not self._check_link(reg.address, old_word, checks):
+            self.stats.counters[LINK_LOST] += 1
+            if self.verbose:
+                print("Lost the device switching back to {} baud".format(old_rate))
+        return False
+
+    def upgrade_baudrate(self, rates=UART_RATES, checks=8):
+        """Switch to the fastest of rates the link carries reliably
+
+        Returns
+        -------
+        int
+            The baud rate in use afterwards, None if not on a UART
+        """
+        if not isinstance(self._transport, UartTransport):
+            return None
+        reg = self._uart_ctrl_2
+        if self.read_register(reg) is None:
+            return self._transport.baudrate
+        self._transport.baudrate = _divider_rate(reg.baud)
+        for rate in rates:
+            if rate <= self._transport.baudrate:
+                break
+            if self.set_baudrate(rate, checks=checks):
+                break
+        return self._transport.baudrate
+
+    def _check_link(self, address, word, checks):
+        # Read address back-to-back, every reply has to hold word
+        transport = self._transport
+        transport.transfer(address, 0xFF, 0xFF, 0xFF)
+        for _ in range(checks):
+            if not transport.transfer(address, 0xFF, 0xFF, 0xFF) or transport.word() != word:
+                return False
+        self._shadow[address] = word
+        return True
+
     def read_configs(self):
-        """Reads the configs from the device into Ctrl Regs"""
-        for reg in self._read_ctrl_regs.list():
-            self.read_register(reg)
-            print("Read reg 0x{:02X}: 0x{:08X}".format(reg.address, reg.to_uint32()))
+        """Reads the configs from the device into Ctrl Regs
+
+        The registers are printed as well when the device is verbose.
+        """
+        self.read_registers(self._read_ctrl_regs.list())
+        if self.verbose:
+            for reg in self._read_ctrl_regs.list():
+                print("Read reg 0x{:02X}: 0x{:08X}".format(reg.address, reg.to_uint32()))
         self.ctrl_regs = self._read_ctrl_regs
         return self.ctrl_regs
 
-    def apply_configs(self):
-        """Apply Ctrl Regs to the device"""
-        for reg in self.ctrl_regs.list():
-            self.write_register(reg)
-        return self.read_configs()
+    def apply_configs(self, force=False):
+        """Apply Ctrl Regs to the device
+
+        Only the 16-bit halves that differ from the shadow copy of the device
+        are sent, and the Registers that were written are read back in the
+        same burst, see `Stpm34.write_registers()`.
+
+        Parameters
+        ----------
+        force : bool
+            Write every Register in full regardless of the shadow copy
+        """
+        self.write_registers(self.ctrl_regs.list(), force)
+        return self.ctrl_regs
+
+    def invalidate_shadow(self):
+        """Forget what is known about the device's registers
+
+        Call this after anything that resets the device behind the driver's
+        back, so the next `Stpm34.write_register` sends every half again.
+        """
+        self._shadow.clear()
 
     def read_register(self, reg):
         """Read an individual Register
@@ -251,66 +789,254 @@ class Stpm34(object):
         ----------
         reg : :obj:`stpm34.Register`
             The Register to read
+
+        Returns
+        -------
+        :obj:`stpm34.Register`
+            The Register, or None if no valid reply came back for it, see
+            `Stpm34.read_registers()`
         """
         if not isinstance(reg, Register):
-            print("Not a register I can read...")
-            return 0
-        fwd_packet = self._write_read_device(reg.address, 0xFF, 0xFF, 0xFF)
-        if not fwd_packet:
-            print("No packet was read!")
-            return 0
-        crc = self._check_crc_en()
-        if crc:
-            self._check_crc(fwd_packet)
-        if len(fwd_packet) != (5 if crc else 4):
-            print("oopsie error (wrong size) got {} needed {}".format(len(fwd_packet), (5 if crc else 4)))
-        reg.from_uint32(int.from_bytes(fwd_packet[:3], 'little'))
+            raise TypeError("Not a register I can read...")
+        transport = self._transport
+        transport.transfer(reg.address, 0xFF, 0xFF, 0xFF)
+        if not self._receive(reg, transport.transfer(0xFF, 0xFF, 0xFF, 0xFF)):
+            return None
         return reg
 
-    def write_register(self, reg):
-        """Write an indivfwd_packetidual Register
+    def read_registers(self, regs):
+        """Read several Registers in one pipelined burst
+
+        Every frame sent to the device carries the address of the next
+        register to read and clocks back the data of the register addressed
+        in the frame before it, so N registers cost N+1 frames instead of 2N.
+
+        A short or corrupt reply is never decoded. The register is read
+        again up to `Stpm34.retries` times on its own, after which the
+        burst picks up again at the next register. A register that never
+        gets a valid reply keeps its old contents and makes the whole read
+        invalid, or raises OSError if `Stpm34.strict` is set.
+
+        Parameters
+        ----------
+        regs : list of :obj:`stpm34.Register`
+            The Registers to read, in the order they are put on the wire
+
+        Returns
+        -------
+        list of :obj:`stpm34.Register`
+            The same Registers, decoded from the device, or None if any of
+            them could not be read
+
+        Raises
+        ------
+        TypeError
+            If any of regs is not a `stpm34.Register`, before anything is
+            read
+        """
+        for reg in regs:
+            if not isinstance(reg, Register):
+                raise TypeError("Not a register I can read...")
+        valid = True
+        prev = None
+        for reg in regs:
+            valid = self._read_frame(prev, reg) and valid
+            prev = reg
+        if prev is not None:
+            valid = self._read_frame(prev, None) and valid
+        return regs if valid else None
+
+    def _read_frame(self, prev, reg):
+        """One frame of a read burst
+
+        Addresses reg, or nothing when it is None, and takes the reply for
+        prev, the Register addressed by the frame before. Every read path,
+        blocking or not, goes through here, and checks that its Registers
+        are Registers before the first frame.
+
+        Returns
+        -------
+        bool
+            False if prev could not be read, see `Stpm34.read_registers()`
+        """
+        address = reg.address if reg is not None else 0xFF
+        ok = self._transport.transfer(address, 0xFF, 0xFF, 0xFF)
+        if prev is None:
+            return True
+        return self._receive(prev, ok, address)
+
+    def write_register(self, reg, force=False):
+        """Write an individual Register
+
+        Each 16-bit half is only sent when one of its bits differs from the
+        shadow copy of the device, or holds a volatile command bit that is set.
 
         Parameters
         ----------
         reg : :obj:`stpm34.Register`
             The Register to write
+        force : bool
+            Send both halves regardless of the shadow copy
+
+        Returns
+        -------
+        bool
+            True if anything was sent to the device
+
+        Raises
+        ------
+        TypeError
+            If reg is not a `stpm34.Register`
         """
         if not isinstance(reg, Register):
-            print("Not a register that I can write...")
+            raise TypeError("Not a register that I can write...")
+        word = reg.to_uint32()
+        changed = self._changed(reg, word, force)
+        if not changed:
+            return False
+        transport = self._transport
+        if changed & 0xFFFF0000:
+            transport.transfer(reg.address, reg.address+1, (word >> 16) & 0xFF, (word >> 24) & 0xFF)
+        if changed & 0x0000FFFF:
+            transport.transfer(reg.address, reg.address, word & 0xFF, (word >> 8) & 0xFF)
+        self._written(reg, word)
+        return True
+
+    def write_registers(self, regs, force=False, verify=True):
+        """Write several Registers in one burst, reading each back on the way
+
+        The changed halves go out back to back as for
+        `Stpm34.write_register()`, and the read address of the first frame
+        of every Register carries the Register written before it, so the
+        read back rides along with the writes. Verifying N Registers with H
+        changed halves costs H+2 frames instead of H+N+1.
+
+        Parameters
+        ----------
+        regs : list of :obj:`stpm34.Register`
+            The Registers to write, in the order they are put on the wire
+        force : bool
+            Write every Register in full regardless of the shadow copy
+        verify : bool
+            Read the written Registers back and compare their stable bits
+
+        Returns
+        -------
+        list of :obj:`stpm34.Register`
+            The Registers that were written, decoded from the device when
+            verified
+
+        Raises
+        ------
+        TypeError
+            If any of regs is not a `stpm34.Register`, before anything is
+            written
+        """
+        for reg in regs:
+            if not isinstance(reg, Register):
+                raise TypeError("Not a register that I can write...")
+        written = []
+        # Written Registers with the word they should read back as
+        check = []
+        # The Register whose data the next reply holds
+        owner = None
+        last = None
+        for reg in regs:
+            word = reg.to_uint32()
+            changed = self._changed(reg, word, force)
+            if not changed:
+                continue
+            written.append(reg)
+            target = last if verify else None
+            if changed & 0xFFFF0000:
+                owner = self._send(owner, target, reg.address+1, (word >> 16) & 0xFF, (word >> 24) & 0xFF, check)
+                target = None
+            if changed & 0x0000FFFF:
+                owner = self._send(owner, target, reg.address, word & 0xFF, (word >> 8) & 0xFF, check)
+            self._written(reg, word)
+            check.append((reg, word))
+            last = reg
+        if verify and last is not None:
+            owner = self._send(owner, last, 0xFF, 0xFF, 0xFF, check)
+            self._send(owner, None, 0xFF, 0xFF, 0xFF, check)
+            # Whatever came back corrupt is read again on its own
+            for reg, word in check:
+                if self.read_register(reg) is not None:
+                    self._compare(reg, word)
+        return written
+
+    def _send(self, owner, target, write_address, lsbyte, msbyte, check):
+        # One frame of a write burst: the reply holds owner, which is
+        # checked against what was written to it, and target is addressed
+        # for the next reply. Returns the new owner.
+        read_address = target.address if target is not None else 0xFF
+        ok = self._transport.transfer(read_address, write_address, lsbyte, msbyte)
+        if owner is not None and ok:
+            for i in range(len(check)):
+                if check[i][0] is owner:
+                    self._decode(owner)
+                    self._compare(owner, check.pop(i)[1])
+                    break
+        return target
+
+    def _compare(self, reg, word):
+        if (reg.to_uint32() ^ word) & reg.STABLE_MASK:
+            self.stats.counters[VERIFY_ERRORS] += 1
+            if self.verbose:
+                print("Reg 0x{:02X} wrote 0x{:08X} read 0x{:08X}".format(reg.address, word, reg.to_uint32()))
+
+    def _changed(self, reg, word, force):
+        # Bits of word that have to be sent, given the shadow copy
+        old = self._shadow.get(reg.address)
+        if force or old is None:
+            return 0xFFFFFFFF
+        return ((old ^ word) & reg.STABLE_MASK) | (word & reg.VOLATILE_MASK)
+
+    def _written(self, reg, word):
+        self._shadow[reg.address] = word & ~reg.VOLATILE_MASK
+        if CAL_FIRST <= reg.address <= CAL_LAST:
+            self._scales = None
+        if reg.address == UART_CTRL_1:
+            # The device switches framing as soon as the half holding
+            # crc_en/lsb_first/crc_poly has been taken
+            self._transport.set_framing(Framing.from_register(reg))
+
+    def _receive(self, reg, ok, next_address=0xFF):
+        # Take the reply for reg from the frame just exchanged, which also
+        # addressed next_address; retry and resync on a bad one
+        if ok:
+            self._decode(reg)
+            return True
+        counters = self.stats.counters
+        transport = self._transport
+        valid = False
+        for _ in range(self.retries):
+            counters[RETRIES] += 1
+            transport.transfer(reg.address, 0xFF, 0xFF, 0xFF)
+            if transport.transfer(0xFF, 0xFF, 0xFF, 0xFF):
+                counters[RECOVERED] += 1
+                self._decode(reg)
+                valid = True
+                break
+        if not valid:
+            counters[INVALID] += 1
+            if self.strict:
+                raise OSError("No valid reply for reg 0x{:02X}".format(reg.address))
+        if next_address != 0xFF:
+            # The retries moved the read pointer, address the next one again
+            transport.transfer(next_address, 0xFF, 0xFF, 0xFF)
+        return valid
+
+    def _decode(self, reg):
+        transport = self._transport
+        word = transport.word()
+        reg.from_uint32(word)
+        address = reg.address
+        if address >= DATA_FIRST:
+            # Measurements, nothing to track
             return
-        reg_bytes = reg.to_bytes()
-        self._write_read_device(reg.address, reg.address+1, reg_bytes[2], reg_bytes[3])
-        self._write_read_device(reg.address, reg.address, reg_bytes[0], reg_bytes[1])
-
-    def _check_crc_en(self):
-        if self.ctrl_regs.uart_ctrl_1.fields["crc_en"].val == 1:
-            if self._read_ctrl_regs.uart_ctrl_1.fields["crc_en"].val == 0:
-                print("Read crc disabled device side, but you're the boss.")
-        if self.ctrl_regs.uart_ctrl_1.fields["crc_en"].val == 0:
-            if self._read_ctrl_regs.uart_ctrl_1.fields["crc_en"].val == 1:
-                print("Read crc enabled device side, but you're the boss.")
-        return self.ctrl_regs.uart_ctrl_1.fields["crc_en"].val == 1
-
-    def _write_read_device(self, read_address, write_address, lsbyte, msbyte):
-        fwd_packet = bytes([read_address, write_address, lsbyte, msbyte])
-        if self._check_crc_en():
-            fwd_packet += bytes([crc8(fwd_packet)])
-        self.cs.value(1)
-        self.cs.value(0)
-        self.bus.write(fwd_packet)
-        self.cs.value(1)
-        self.cs.value(0)
-        if self._check_crc_en():
-            ret = self.bus.read(5, 0xff)
-        else:
-            ret = self.bus.read(4, 0xff)
-        self.cs.value(1)
-        return ret
-
-    def _check_crc(self, packet):
-        if packet and len(packet) == 5:
-            hash = crc8(packet[:4])
-            if hash != packet[4]:
-                print("crc error calc'd 0x{:02X} recv'd 0x{:02X}".format(hash, packet[4]))
-        else:
-            print("crc error (wrong size) got {} needed 5".format(len(packet)))
+        self._shadow[address] = word
+        if CAL_FIRST <= address <= CAL_LAST:
+            self._scales = None
+        if address == UART_CTRL_1:
+            transport.set_framing(Framing.from_register(reg))
@@ -20,93 +20,104 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
-from .register import Register
+from .register import Register, layout
 from .field import Field
 
 
+@layout
 class CtrlDFE1_2(Register):
+    __slots__ = ()
+    FIELDS = {
+        "volt_reading_en": Field(0),
+        "current_reading_en": Field(16),
+        "gain": Field(26, 2)
+    }
+
     def __init__(self, address, value):
-        fields = {
-            "volt_reading_en": Field(0),
-            "current_reading_en": Field(16),
-            "gain": Field(26, 2)
-        }
-        super(CtrlDFE1_2, self).__init__(address, value, fields)
+        super(CtrlDFE1_2, self).__init__(address, value)
 
 
+@layout
 class CtrlIRQ(Register):
+    __slots__ = ()
+    FIELDS = {
+        "tot_sign_pow_a": Field(0),
+        "tot_sign_pow_r": Field(1),
+        "tot_energy_ovf_a": Field(2),
+        "tot_energy_ovf_r": Field(3),
+        "ch2_sign_pow_a": Field(4),
+        "ch2_sign_pow_f": Field(5),
+        "ch2_sign_pow_r": Field(6),
+        "ch2_sign_pow_s": Field(7),
+        "ch2_energy_ovf_a": Field(8),
+        "ch2_energy_ovf_f": Field(9),
+        "ch2_energy_ovf_r": Field(10),
+        "ch2_energy_ovf_s": Field(11),
+        "ch1_sign_pow_a": Field(12),
+        "ch1_sign_pow_f": Field(13),
+        "ch1_sign_pow_r": Field(14),
+        "ch1_sign_pow_s": Field(15),
+        "ch1_energy_ovf_a": Field(16),
+        "ch1_energy_ovf_f": Field(17),
+        "ch1_energy_ovf_r": Field(18),
+        "ch1_energy_ovf_s": Field(19),
+        "current_adc_stuck": Field(20),
+        "ah_accum": Field(21),
+        "current_swell_detect": Field(22),
+        "current_swell_end": Field(23),
+        "volt_adc_stuck": Field(24),
+        "volt_period_err": Field(25),
+        "volt_sag_detect": Field(26),
+        "volt_sag_end": Field(27),
+        "volt_swell_detect": Field(28),
+        "volt_swell_end": Field(29),
+        "tamper_on": Field(30),
+        "tamper_or_wrong_conn": Field(31)
+    }
+
     def __init__(self, address, value=0x00000000):
-        fields = {
-            "tot_sign_pow_a": Field(0),
-            "tot_sign_pow_r": Field(1),
-            "tot_energy_ovf_a": Field(2),
-            "tot_energy_ovf_r": Field(3),
-            "ch2_sign_pow_a": Field(4),
-            "ch2_sign_pow_f": Field(5),
-            "ch2_sign_pow_r": Field(6),
-            "ch2_sign_pow_s": Field(7),
-            "ch2_energy_ovf_a": Field(8),
-            "ch2_energy_ovf_f": Field(9),
-            "ch2_energy_ovf_r": Field(10),
-            "ch2_energy_ovf_s": Field(11),
-            "ch1_sign_pow_a": Field(12),
-            "ch1_sign_pow_f": Field(13),
-            "ch1_sign_pow_r": Field(14),
-            "ch1_sign_pow_s": Field(15),
-            "ch1_energy_ovf_a": Field(16),
-            "ch1_energy_ovf_f": Field(17),
-            "ch1_energy_ovf_r": Field(18),
-            "ch1_energy_ovf_s": Field(19),
-            "current_adc_stuck": Field(20),
-            "ah_accum": Field(21),
-            "current_swell_detect": Field(22),
-            "current_swell_end": Field(23),
-            "volt_adc_stuck": Field(24),
-            "volt_period_err": Field(25),
-            "volt_sag_detect": Field(26),
-            "volt_sag_end": Field(27),
-            "volt_swell_detect": Field(28),
-            "volt_swell_end": Field(29),
-            "tamper_on": Field(30),
-            "tamper_or_wrong_conn": Field(31)
-        }
-        super(CtrlIRQ, self).__init__(address, value, fields)
+        super(CtrlIRQ, self).__init__(address, value)
 
 
+@layout
 class CtrlStatus(Register):
+    __slots__ = ()
+    # Set by the device and cleared by writing them as 1
+    VOLATILE_MASK = 0xFFFFFFFF
+    FIELDS = {
+        "tot_sign_pow_a": Field(0),
+        "tot_sign_pow_r": Field(1),
+        "tot_energy_ovf_a": Field(2),
+        "tot_energy_ovf_r": Field(3),
+        "ch2_sign_pow_a": Field(4),
+        "ch2_sign_pow_f": Field(5),
+        "ch2_sign_pow_r": Field(6),
+        "ch2_sign_pow_s": Field(7),
+        "ch2_energy_ovf_a": Field(8),
+        "ch2_energy_ovf_f": Field(9),
+        "ch2_energy_ovf_r": Field(10),
+        "ch2_energy_ovf_s": Field(11),
+        "ch1_sign_pow_a": Field(12),
+        "ch1_sign_pow_f": Field(13),
+        "ch1_sign_pow_r": Field(14),
+        "ch1_sign_pow_s": Field(15),
+        "ch1_energy_ovf_a": Field(16),
+        "ch1_energy_ovf_f": Field(17),
+        "ch1_energy_ovf_r": Field(18),
+        "ch1_energy_ovf_s": Field(19),
+        "current_adc_stuck": Field(20),
+        "ah_accum": Field(21),
+        "current_swell_detect": Field(22),
+        "current_swell_end": Field(23),
+        "volt_adc_stuck": Field(24),
+        "volt_period_err": Field(25),
+        "volt_sag_detect": Field(26),
+        "volt_sag_end": Field(27),
+        "volt_swell_detect": Field(28),
+        "volt_swell_end": Field(29),
+        "tamper_on": Field(30),
+        "tamper_or_wrong_conn": Field(31)
+    }
+
     def __init__(self, address, value=0x00000000):
-        fields = {
-            "tot_sign_pow_a": Field(0),
-            "tot_sign_pow_r": Field(1),
-            "tot_energy_ovf_a": Field(2),
-            "tot_energy_ovf_r": Field(3),
-            "ch2_sign_pow_a": Field(4),
-            "ch2_sign_pow_f": Field(5),
-            "ch2_sign_pow_r": Field(6),
-            "ch2_sign_pow_s": Field(7),
-            "ch2_energy_ovf_a": Field(8),
-            "ch2_energy_ovf_f": Field(9),
-            "ch2_energy_ovf_r": Field(10),
-            "ch2_energy_ovf_s": Field(11),
-            "ch1_sign_pow_a": Field(12),
-            "ch1_sign_pow_f": Field(13),
-            "ch1_sign_pow_r": Field(14),
-            "ch1_sign_pow_s": Field(15),
-            "ch1_energy_ovf_a": Field(16),
-            "ch1_energy_ovf_f": Field(17),
-            "ch1_energy_ovf_r": Field(18),
-            "ch1_energy_ovf_s": Field(19),
-            "current_adc_stuck": Field(20),
-            "ah_accum": Field(21),
-            "current_swell_detect": Field(22),
-            "current_swell_end": Field(23),
-            "volt_adc_stuck": Field(24),
-            "volt_period_err": Field(25),
-            "volt_sag_detect": Field(26),
-            "volt_sag_end": Field(27),
-            "volt_swell_detect": Field(28),
-            "volt_swell_end": Field(29),
-            "tamper_on": Field(30),
-            "tamper_or_wrong_conn": Field(31)
-        }
-        super(CtrlStatus, self).__init__(address, value, fields)
+        super(CtrlStatus, self).__init__(address, value)
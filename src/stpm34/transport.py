@@ -0,0 +1,164 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+from .stats import FRAMES, BYTES, CRC_ERRORS, SHORT_FRAMES
+
+
+class Transport(object):
+    """Frame transport for one device, shared by the SPI and UART backends
+
+    The transport owns one TX and one RX buffer for the life of the device
+    and fills them in place, so exchanging a frame allocates nothing.
+    Framing and CRC checking live here; a backend only has to move
+    ``framing.size`` bytes each way in `Transport._exchange()`.
+
+    Parameters
+    ----------
+    framing : :obj:`stpm34.framing.Framing`
+        The frame format the device currently expects
+    stats : :obj:`stpm34.stats.Stats`
+        Where frames, bytes, short replies and CRC errors are counted
+    """
+
+    def __init__(self, framing, stats):
+        self._counters = stats.counters
+        self._tx = bytearray(5)
+        self._rx = bytearray(5)
+        self.set_framing(framing)
+
+    def set_framing(self, framing):
+        """Switch to a new frame format, see `CtrlUART1`"""
+        self.framing = framing
+        self._tx_view = memoryview(self._tx)[:framing.size]
+        self._rx_view = memoryview(self._rx)[:framing.size]
+
+    def _exchange(self):
+        """Send the TX view and fill the RX view, returning the bytes received
+
+        The one hook a backend has to implement, the base class has no bus
+        to move bytes on; see `SpiTransport` and `UartTransport`.
+        """
+        raise NotImplementedError
+
+    def transfer(self, read_address, write_address, lsbyte, msbyte):
+        """Exchange one frame with the device
+
+        The reply, left in the RX buffer until the next transfer, holds the
+        data of the register addressed by the previous frame.
+
+        Returns
+        -------
+        bool
+            False if the reply was short or failed its CRC check
+        """
+        framing = self.framing
+        framing.fill(self._tx, read_address, write_address, lsbyte, msbyte)
+        received = self._exchange()
+        counters = self._counters
+        counters[FRAMES] += 1
+        counters[BYTES] += framing.size
+        if received < framing.size:
+            counters[SHORT_FRAMES] += 1
+            return False
+        if framing.crc_en and not framing.check(self._rx):
+            counters[CRC_ERRORS] += 1
+            return False
+        return True
+
+    def word(self):
+        """The 32-bit data word of the last reply"""
+        rx = self._rx
+        return rx[0] | (rx[1] << 8) | (rx[2] << 16) | (rx[3] << 24)
+
+
+class SpiTransport(Transport):
+    """Full-duplex SPI backend
+
+    Parameters
+    ----------
+    bus : machine.SPI
+        The bus the device sits on
+    cs : machine.Pin
+        The device's chip select, active low
+    framing : :obj:`stpm34.framing.Framing`
+        The frame format the device currently expects
+    stats : :obj:`stpm34.stats.Stats`
+        Where frames, bytes and CRC errors are counted
+    """
+
+    def __init__(self, bus, cs, framing, stats):
+        self.bus = bus
+        self.cs = cs
+        super(SpiTransport, self).__init__(framing, stats)
+
+    def _exchange(self):
+        cs = self.cs
+        cs.value(1)
+        cs.value(0)
+        self.bus.write_readinto(self._tx_view, self._rx_view)
+        cs.value(1)
+        return self.framing.size
+
+
+class UartTransport(Transport):
+    """Half-duplex UART backend
+
+    Every frame is written whole and answered with a frame of the same
+    size. A short reply leaves the rest of it to arrive late, so anything
+    waiting in the receive buffer is thrown away before the next frame.
+
+    Parameters
+    ----------
+    uart : machine.UART
+        The UART the device is wired to, with a read timeout set
+    framing : :obj:`stpm34.framing.Framing`
+        The frame format the device currently expects
+    stats : :obj:`stpm34.stats.Stats`
+        Where frames, bytes, short replies and CRC errors are counted
+    baudrate : int
+        The rate the UART was opened at, the STPM34 resets to 9600
+    """
+
+    def __init__(self, uart, framing, stats, baudrate=9600):
+        self.bus = uart
+        self.baudrate = baudrate
+        self._stale = False
+        super(UartTransport, self).__init__(framing, stats)
+
+    def set_baudrate(self, baudrate):
+        """Reopen the host UART at a new rate"""
+        self.bus.init(baudrate=baudrate)
+        self.baudrate = baudrate
+        self._stale = True
+
+    def _exchange(self):
+        uart = self.bus
+        if self._stale:
+            if uart.any():
+                uart.read()
+            self._stale = False
+        uart.write(self._tx_view)
+        received = uart.readinto(self._rx_view)
+        if received is None or received < self.framing.size:
+            self._stale = True
+            return received or 0
+        return received
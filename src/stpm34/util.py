@@ -20,6 +20,24 @@ furnished to do so, subject to the following conditions:
     SOFTWARE.
 """
 
+try:
+    from time import sleep_ms, ticks_ms, ticks_us, ticks_diff
+except ImportError:
+    # CPython, e.g. when the driver talks to the stpm34sim simulator
+    import time as _time
+
+    def sleep_ms(ms):
+        _time.sleep(ms / 1000.0)
+
+    def ticks_ms():
+        return int(_time.monotonic() * 1000) & 0x3FFFFFFF
+
+    def ticks_us():
+        return int(_time.monotonic() * 1000000) & 0x3FFFFFFF
+
+    def ticks_diff(end, start):
+        return ((end - start + 0x20000000) & 0x3FFFFFFF) - 0x20000000
+
 
 def bitwise_reverse(n):
     n = ((n >> 1) & 0x55) | ((n << 1) & 0xaa)
@@ -28,18 +46,81 @@ def bitwise_reverse(n):
     return n
 
 
-def crc8(bytes_, sum_=0x00, poly_=0x07):
+_crc8_tables = {}
+
+
+def crc8_table(poly_=0x07, lsb_first=False):
+    """Return the 256 entry lookup table for a CRC-8 polynomial
+
+    Tables are built on first use and kept for the life of the program, one
+    per (polynomial, bit order) pair. The ``lsb_first`` table is the
+    reflected form: it computes the CRC of bit reversed bytes and reverses the
+    result, which is what the device expects when `CtrlUART1.lsb_first` is set.
+    """
+    key = (poly_ << 1) | (1 if lsb_first else 0)
+    table = _crc8_tables.get(key)
+    if table is None:
+        table = bytearray(256)
+        for i in range(256):
+            if lsb_first:
+                table[i] = bitwise_reverse(__calc(bitwise_reverse(i), 0, poly_))
+            else:
+                table[i] = __calc(i, 0, poly_)
+        _crc8_tables[key] = table
+    return table
+
+
+def crc8(bytes_, sum_=0x00, poly_=0x07, lsb_first=False):
     if isinstance(bytes_, str):
         raise TypeError("Unicode-objects must be encoded before hashing")
-    elif not isinstance(bytes_, (bytes, bytearray)):
+    elif not isinstance(bytes_, (bytes, bytearray, memoryview)):
         raise TypeError("object supporting the buffer API required")
+    table = crc8_table(poly_, lsb_first)
     _sum = sum_
-    _poly = poly_
     for byte in bytes_:
-        _sum = __calc(byte, _sum, _poly)
+        _sum = table[_sum ^ byte]
     return _sum
 
 
+def verify_frames(buffer, n, poly_=0x07, lsb_first=False, size=5):
+    """Check the CRC byte of n consecutive frames held in one buffer
+
+    Parameters
+    ----------
+    buffer : bytes, bytearray or memoryview
+        At least ``n * size`` bytes of back to back frames, each ending in
+        its CRC byte
+    n : int
+        Number of frames to check
+    poly_ : int
+        CRC polynomial, see `CtrlUART1.crc_poly`
+    lsb_first : bool
+        Use the reflected CRC, see `CtrlUART1.lsb_first`
+    size : int
+        Length of one frame including the CRC byte
+
+    Returns
+    -------
+    int
+        Bit mask of the frames whose CRC did not match (bit i set for frame
+        i), 0 when every frame is good
+    """
+    table = crc8_table(poly_, lsb_first)
+    mv = memoryview(buffer)
+    bad = 0
+    end = 0
+    for i in range(n):
+        _sum = 0
+        start = end
+        end = start + size - 1
+        for j in range(start, end):
+            _sum = table[_sum ^ mv[j]]
+        if _sum != mv[end]:
+            bad |= 1 << i
+        end += 1
+    return bad
+
+
 def __calc(b, s, crc_8):
     for _ in range(8):
         t = b ^ s
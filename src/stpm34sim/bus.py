@@ -0,0 +1,252 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import random
+
+# Clock of the device's UART baud divider, Hz, and the divider's row
+UART_CLOCK = 16000000
+UART_CTRL_2 = 0x26
+
+
+class FakePin(object):
+    """Stand-in for `machine.Pin` that remembers its level
+
+    Parameters
+    ----------
+    value : int
+        Starting level
+    on_change : callable, optional
+        Called with the new level whenever it changes
+    """
+    OUT = 1
+    IN = 0
+    PULL_UP = 2
+    IRQ_RISING = 1
+    IRQ_FALLING = 2
+
+    def __init__(self, value=1, on_change=None):
+        self._value = value
+        self.on_change = on_change
+        self._handler = None
+        self._trigger = 0
+
+    def irq(self, handler=None, trigger=IRQ_FALLING | IRQ_RISING):
+        """Call handler with the pin on the edges given by trigger"""
+        self._handler = handler
+        self._trigger = trigger
+
+    def value(self, value=None):
+        if value is None:
+            return self._value
+        value = 1 if value else 0
+        if value != self._value:
+            self._value = value
+            if self.on_change is not None:
+                self.on_change(value)
+            edge = self.IRQ_RISING if value else self.IRQ_FALLING
+            if self._handler is not None and self._trigger & edge:
+                self._handler(self)
+
+    def on(self):
+        self.value(1)
+
+    def off(self):
+        self.value(0)
+
+    def __call__(self, value=None):
+        return self.value(value)
+
+
+class FakeSPI(object):
+    """Stand-in for `machine.SPI` with simulated devices behind it
+
+    Every call made while exactly one attached chip select is low is one
+    frame for that device. Calls with no chip select low clock into nothing
+    and read back 0xFF, as on an idle bus.
+
+    Parameters
+    ----------
+    baudrate : int
+        Starting clock rate
+    max_baudrate : int, optional
+        Fastest clock the wiring carries cleanly; above it every reply has
+        a bit flipped. No limit if None.
+    error_rate : float
+        Chance of any one reply getting a bit flipped, as interference would
+    seed : int, optional
+        Seed for the interference
+
+    Attributes
+    ----------
+    baudrate : int
+        Clock rate last set with `FakeSPI.init()`
+    transfers : int
+        Bus calls made while a device was selected
+    bytes : int
+        Bytes clocked in each direction
+    """
+
+    def __init__(self, baudrate=200000, max_baudrate=None, error_rate=0.0, seed=None):
+        self.baudrate = baudrate
+        self.max_baudrate = max_baudrate
+        self.error_rate = error_rate
+        self.random = random.Random(seed)
+        self.transfers = 0
+        self.bytes = 0
+        self._devices = []
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def attach(self, device, cs=None, syn=None):
+        """Put a `stpm34sim.Stpm34Device` on the bus
+
+        Parameters
+        ----------
+        device : :obj:`stpm34sim.Stpm34Device`
+            The simulated chip
+        cs : :obj:`FakePin`, optional
+            Its chip select, a new one is made if not given
+        syn : :obj:`FakePin`, optional
+            Its SYN pin, a rising edge latches both channels
+
+        Returns
+        -------
+        :obj:`FakePin`
+            The chip select to hand to `stpm34.Stpm34`
+        """
+        if cs is None:
+            cs = FakePin(1)
+        if syn is not None:
+            syn.on_change = lambda value: value and device.syn_pulse()
+        self._devices.append((cs, device))
+        return cs
+
+    def _selected(self):
+        selected = None
+        for cs, device in self._devices:
+            if not cs.value():
+                if selected is not None:
+                    raise RuntimeError("more than one chip select is low")
+                selected = device
+        return selected
+
+    def _exchange(self, tx):
+        self.bytes += len(tx)
+        device = self._selected()
+        if device is None:
+            return b'\xff' * len(tx)
+        self.transfers += 1
+        reply = device.exchange(bytes(tx))
+        if (self.max_baudrate is not None and self.baudrate > self.max_baudrate) or \
+                (self.error_rate and self.random.random() < self.error_rate):
+            reply = bytes([reply[0] ^ 0x10]) + reply[1:]
+        return reply
+
+    def write(self, buf):
+        self._exchange(buf)
+
+    def read(self, nbytes, write=0x00):
+        return self._exchange(bytes([write]) * nbytes)
+
+    def readinto(self, buf, write=0x00):
+        buf[:] = self._exchange(bytes([write]) * len(buf))
+
+    def write_readinto(self, write_buf, read_buf):
+        read_buf[:] = self._exchange(write_buf)
+
+
+class FakeUART(object):
+    """Stand-in for `machine.UART` wired to one simulated device
+
+    The device runs at the rate its `CtrlUART2` divider gives. A frame
+    written at a rate more than 2% off is lost and gets no reply, and
+    above ``max_baudrate`` replies arrive with a byte corrupted.
+
+    Parameters
+    ----------
+    device : :obj:`stpm34sim.Stpm34Device`
+        The simulated chip
+    baudrate : int
+        Host rate to start at
+    max_baudrate : int, optional
+        Fastest rate the wiring carries cleanly, no limit if None
+
+    Attributes
+    ----------
+    transfers : int
+        Frames written
+    bytes : int
+        Bytes written
+    """
+
+    def __init__(self, device, baudrate=9600, max_baudrate=None):
+        self.device = device
+        self.baudrate = baudrate
+        self.max_baudrate = max_baudrate
+        self.transfers = 0
+        self.bytes = 0
+        self._rx = b''
+
+    def init(self, baudrate=None, **kwargs):
+        if baudrate is not None:
+            self.baudrate = baudrate
+
+    def deinit(self):
+        pass
+
+    def device_baudrate(self):
+        """The rate the device is listening at"""
+        return UART_CLOCK / float(max(self.device.rows[UART_CTRL_2] & 0xFFFF, 1))
+
+    def any(self):
+        return len(self._rx)
+
+    def write(self, buf):
+        self.transfers += 1
+        self.bytes += len(buf)
+        if abs(self.baudrate - self.device_baudrate()) > 0.02 * self.baudrate:
+            return len(buf)
+        reply = bytearray(self.device.exchange(bytes(buf)))
+        if self.max_baudrate is not None and self.baudrate > self.max_baudrate:
+            reply[0] ^= 0x10
+        self._rx += bytes(reply)
+        return len(buf)
+
+    def read(self, nbytes=None):
+        if nbytes is None:
+            nbytes = len(self._rx)
+        data, self._rx = self._rx[:nbytes], self._rx[nbytes:]
+        return data or None
+
+    def readinto(self, buf, nbytes=None):
+        if nbytes is None:
+            nbytes = len(buf)
+        data = self.read(nbytes)
+        if data is None:
+            return None
+        buf[:len(data)] = data
+        return len(data)
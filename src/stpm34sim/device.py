@@ -0,0 +1,347 @@
+"""
+Copyright (c) 2020 Tyler Cone
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+    The above copyright notice and this permission notice shall be included in all
+    copies or substantial portions of the Software.
+
+    THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+    IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+    FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+    AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+    LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+    OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+    SOFTWARE.
+"""
+
+import math
+import random
+import time
+
+from stpm34 import CtrlRegs, DataRegs, Stpm34
+from stpm34.dsp_ctrl_regs import CtrlDSP1_2, CtrlDSP4, CtrlDSP9_11, CtrlDSP10_12
+from stpm34.stpm_ctrl_regs import CtrlDFE1_2, CtrlIRQ, CtrlStatus
+from stpm34.uart_ctrl_regs import CtrlUART2, CtrlUARTStatus
+from stpm34.energy import ENERGY_RATE
+from stpm34.util import crc8
+
+# Rows of the register file, see the STPM34 register map
+DSP_CR1 = 0x00
+DSP_CR3 = 0x04
+DSP_CR5 = 0x08
+DSP_IRQ1 = 0x1C
+DSP_SR1 = 0x20
+US_REG1 = 0x24
+US_REG3 = 0x28
+DSP_REG1 = 0x2E
+DSP_REG2 = 0x30
+DSP_REG14 = 0x48
+DSP_REG15 = 0x4A
+PH1_REG1 = 0x54
+PH2_REG1 = 0x6C
+TOT_REG1 = 0x84
+LAST_ROW = 0x8A
+
+# Bits of DSP_CR3
+SOFTWARE_RESET = 0x00100000
+LATCH1 = 0x00200000
+LATCH2 = 0x00400000
+AUTO_LATCH = 0x00800000
+
+# Bits of US_REG3
+SPI_CRC_ERROR = 0x10000000
+
+# Rows whose bits are cleared by writing them as 1
+STATUS_ROWS = (0x20, 0x22, US_REG3)
+
+
+class Channel(object):
+    """Synthetic mains signal seen by one channel of the device
+
+    Attributes
+    ----------
+    vrms : float
+        RMS voltage in volts
+    irms : float
+        RMS current in amps
+    freq : float
+        Line frequency in Hz
+    phase : float
+        Current lag behind voltage in degrees
+    noise : float
+        Relative standard deviation of the gaussian noise added to every
+        latched RMS value
+    """
+
+    def __init__(self, vrms=120.0, irms=1.0, freq=60.0, phase=0.0, noise=0.0):
+        self.vrms = vrms
+        self.irms = irms
+        self.freq = freq
+        self.phase = phase
+        self.noise = noise
+
+    def v(self, t):
+        """Instantaneous voltage at time t, in seconds"""
+        return self.vrms * math.sqrt(2) * math.sin(2 * math.pi * self.freq * t)
+
+    def i(self, t):
+        """Instantaneous current at time t, in seconds"""
+        return self.irms * math.sqrt(2) * math.sin(2 * math.pi * self.freq * t - math.radians(self.phase))
+
+
+def reset_rows():
+    """Reset value of every row of the register file, by address"""
+    rows = {}
+    for address in range(0, LAST_ROW + 2, 2):
+        rows[address] = 0
+    extra = [CtrlDSP1_2(0x00, 0x040000A0), CtrlDSP1_2(0x02, 0x240000A0),
+             CtrlDSP4(0x06), CtrlDSP9_11(0x10), CtrlDSP10_12(0x12),
+             CtrlDSP9_11(0x14), CtrlDSP10_12(0x16),
+             CtrlDFE1_2(0x1A, 0x0F270327), CtrlIRQ(0x1C), CtrlIRQ(0x1E),
+             CtrlStatus(0x20), CtrlStatus(0x22), CtrlUART2(), CtrlUARTStatus()]
+    for reg in extra + CtrlRegs().list() + DataRegs().list():
+        rows[reg.address] = reg.to_uint32()
+    return rows
+
+
+class Stpm34Device(object):
+    """In-process model of an STPM34 on the SPI side
+
+    The model keeps the 32-bit register file, answers frames with the
+    pipelined protocol of the real chip (each frame returns the row that the
+    previous frame addressed, then applies its own 16-bit write), honours
+    `CtrlUART1` CRC settings and clears software latches after
+    ``latch_delay`` seconds, filling the data rows from the two `Channel`'s.
+
+    Parameters
+    ----------
+    ch1, ch2 : :obj:`Channel`, optional
+        Signals on the primary and secondary channels
+    latch_delay : float
+        Seconds between a software latch request and the latch bits clearing
+    clock : callable
+        Returns the current time in seconds, `time.monotonic` by default
+    seed : int, optional
+        Seed for the noise generator
+
+    Attributes
+    ----------
+    rows : dict
+        The register file, 32-bit words by even row address
+    frames : int
+        Frames received
+    crc_errors : int
+        Frames dropped because their CRC did not match
+    writes : int
+        16-bit writes applied
+    latches : int
+        Measurements latched into the data rows
+    int_pins : list
+        `FakePin`'s for INT1 and INT2, see `Stpm34Device.attach_int()`
+    """
+
+    def __init__(self, ch1=None, ch2=None, latch_delay=0.0005, clock=time.monotonic, seed=None):
+        self.ch1 = ch1 if ch1 is not None else Channel()
+        self.ch2 = ch2 if ch2 is not None else Channel()
+        self.latch_delay = latch_delay
+        self.clock = clock
+        self.random = random.Random(seed)
+        self.frames = 0
+        self.crc_errors = 0
+        self.writes = 0
+        self.latches = 0
+        self.int_pins = [None, None]
+        self.reset()
+
+    def reset(self):
+        """Return every row to its reset value"""
+        self.rows = reset_rows()
+        self._pointer = 0
+        self._latch_at = None
+        # Energy in counter LSBs as floats, per channel (active,
+        # fundamental, reactive, apparent), and when they were last advanced
+        self._energy = [[0.0] * 4, [0.0] * 4]
+        self._energy_at = self.clock()
+
+    def crc_en(self):
+        return bool(self.rows[US_REG1] & 0x4000)
+
+    def frame_size(self):
+        return 5 if self.crc_en() else 4
+
+    def _crc(self, data):
+        us1 = self.rows[US_REG1]
+        return crc8(bytes(data), 0, us1 & 0xFF, bool(us1 & 0x8000))
+
+    def exchange(self, tx):
+        """Process one frame and return the reply
+
+        Parameters
+        ----------
+        tx : bytes
+            The frame as clocked in on MOSI
+
+        Returns
+        -------
+        bytes
+            What the device clocks out on MISO, as long as tx
+        """
+        self.frames += 1
+        self.tick()
+        size = self.frame_size()
+        word = self.rows.get(self._pointer, 0)
+        reply = bytearray(word.to_bytes(4, 'little'))
+        if size == 5:
+            reply.append(self._crc(reply))
+        frame = bytearray(tx[:size])
+        while len(frame) < size:
+            frame.append(0xFF)
+        if size == 5 and self._crc(frame[:4]) != frame[4]:
+            self.crc_errors += 1
+            self.rows[US_REG3] |= SPI_CRC_ERROR
+        else:
+            self._apply(frame[0], frame[1], frame[2] | (frame[3] << 8))
+        out = bytes(reply[:len(tx)])
+        return out + b'\xff' * (len(tx) - len(out))
+
+    def _apply(self, read_address, write_address, half):
+        if write_address != 0xFF:
+            self.write_half(write_address, half)
+        if read_address != 0xFF:
+            self._pointer = read_address & 0xFE
+        else:
+            self._pointer = (self._pointer + 2) & 0xFE
+
+    def write_half(self, address, half):
+        """Apply a 16-bit write as the protocol would"""
+        row = address & 0xFE
+        if row >= DSP_REG1 or row not in self.rows:
+            return
+        self.writes += 1
+        word = self.rows[row]
+        shift = 16 if address & 1 else 0
+        if row in STATUS_ROWS:
+            self.rows[row] = word & ~(half << shift)
+            self._update_int()
+            return
+        word = (word & ~(0xFFFF << shift)) | (half << shift)
+        if row == DSP_CR3:
+            if word & SOFTWARE_RESET:
+                self.reset()
+                return
+            if word & (LATCH1 | LATCH2) and self._latch_at is None:
+                self._latch_at = self.clock() + self.latch_delay
+        self.rows[row] = word
+        if row in (DSP_IRQ1, DSP_IRQ1 + 2):
+            self._update_int()
+        if self.latch_delay <= 0:
+            self.tick()
+
+    def attach_int(self, pin, line=1):
+        """Drive a pin as INT1 or INT2, low while an unmasked status bit is set"""
+        self.int_pins[line - 1] = pin
+        self._update_int()
+
+    def raise_status(self, bits, line=1):
+        """Set bits of DSP_SR1 or DSP_SR2, as a power quality event would"""
+        self.rows[DSP_SR1 + 2 * (line - 1)] |= bits
+        self._update_int()
+
+    def _update_int(self):
+        for i, pin in enumerate(self.int_pins):
+            if pin is not None:
+                active = self.rows[DSP_SR1 + 2 * i] & self.rows[DSP_IRQ1 + 2 * i]
+                pin.value(0 if active else 1)
+
+    def tick(self):
+        """Let time pass: finish pending latches and run auto latch"""
+        cr3 = self.rows[DSP_CR3]
+        if cr3 & AUTO_LATCH:
+            self.latch()
+        if self._latch_at is not None and self.clock() >= self._latch_at:
+            self._latch_at = None
+            self.latch()
+            self.rows[DSP_CR3] = self.rows[DSP_CR3] & ~(LATCH1 | LATCH2)
+
+    def syn_pulse(self):
+        """A pulse on the SYN pin latches both channels"""
+        self.latch()
+
+    def _calibration(self, row):
+        return (0.125 * ((self.rows[row] & 0xFFF) / 2048.0)) + 0.75
+
+    def _noisy(self, value, channel):
+        if channel.noise:
+            value *= 1.0 + self.random.gauss(0.0, channel.noise)
+        return value
+
+    def raw_rms(self, channel, index):
+        """The (vrms, crms) register values the device would latch"""
+        calv = self._calibration(DSP_CR5 + 4 * index)
+        cali = self._calibration(DSP_CR5 + 4 * index + 2)
+        v = self._noisy(channel.vrms, channel)
+        c = self._noisy(channel.irms, channel)
+        v_reg = v * calv * Stpm34.AV * (2**15) / (Stpm34.Vref * (1 + (Stpm34.R1 / Stpm34.R2)))
+        c_reg = c * cali * Stpm34.AI * (2**17) * Stpm34.ks * Stpm34.kint / Stpm34.Vref
+        v_reg = min(max(int(round(v_reg)), 0), 0x7FFF)
+        c_reg = min(max(int(round(c_reg)), 0), 0x1FFFF)
+        return v_reg, c_reg
+
+    def power_lsb(self, index):
+        """Watts per LSB of the power rows of a channel"""
+        calv = self._calibration(DSP_CR5 + 4 * index)
+        cali = self._calibration(DSP_CR5 + 4 * index + 2)
+        return (Stpm34.Vref ** 2 * (1 + (Stpm34.R1 / Stpm34.R2))) / (
+            Stpm34.ks * Stpm34.kint * Stpm34.AV * Stpm34.AI * calv * cali * (2**28))
+
+    def raw_powers(self, channel, index):
+        """(active, fundamental, reactive, apparent) power row values"""
+        lsb = self.power_lsb(index)
+        s = channel.vrms * channel.irms
+        phi = math.radians(channel.phase)
+        p = s * math.cos(phi)
+        q = s * math.sin(phi)
+        return p / lsb, p / lsb, q / lsb, s / lsb
+
+    def _latch_power(self, t):
+        dt = t - self._energy_at
+        self._energy_at = t
+        tot = [0.0] * 4
+        for index, channel in enumerate((self.ch1, self.ch2)):
+            base = PH1_REG1 if index == 0 else PH2_REG1
+            powers = self.raw_powers(channel, index)
+            energy = self._energy[index]
+            for k in range(4):
+                energy[k] += powers[k] * dt * ENERGY_RATE
+                tot[k] += energy[k]
+                self.rows[base + 2 * k] = int(energy[k]) & 0xFFFFFFFF
+            for k, value in enumerate(powers + (powers[3], powers[0], powers[1])):
+                self.rows[base + 8 + 2 * k] = int(value) & 0x1FFFFFFF
+        for k in range(4):
+            self.rows[TOT_REG1 + 2 * k] = int(tot[k]) & 0xFFFFFFFF
+
+    def latch(self):
+        """Copy the current state of both channels into the data rows"""
+        self.latches += 1
+        t = self.clock()
+        self._latch_power(t)
+        periods = 0
+        for index, channel in enumerate((self.ch1, self.ch2)):
+            v_reg, c_reg = self.raw_rms(channel, index)
+            self.rows[DSP_REG14 + 2 * index] = v_reg | (c_reg << 15)
+            # Period in 8us steps
+            period = int(round(1.0 / (channel.freq * 8e-6))) & 0xFFF if channel.freq else 0
+            periods |= period << (16 * index)
+            # Instantaneous voltage and current data, 24-bit two's complement
+            v = int(v_reg * math.sqrt(2) * math.sin(2 * math.pi * channel.freq * t)) & 0xFFFFFF
+            c = int(c_reg * math.sqrt(2) * math.sin(2 * math.pi * channel.freq * t
+                                                    - math.radians(channel.phase))) & 0xFFFFFF
+            self.rows[DSP_REG2 + 4 * index] = v
+            self.rows[DSP_REG2 + 4 * index + 2] = c
+        self.rows[DSP_REG1] = periods
@@ -0,0 +1,76 @@
+"""Simulated meters shared by the tests
+
+Every test builds its meter here, on a `stpm34sim.Stpm34Device` behind a
+`stpm34sim.FakeSPI` or `stpm34sim.FakeUART`, so nothing needs hardware.
+"""
+
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+
+from stpm34 import Stpm34  # noqa: E402
+from stpm34sim import Channel, FakePin, FakeSPI, FakeUART, Stpm34Device  # noqa: E402
+
+
+class CountingPin(FakePin):
+    """Chip select that counts the windows it opens, one per frame"""
+
+    def __init__(self, value=1):
+        super(CountingPin, self).__init__(value)
+        self.windows = 0
+
+    def value(self, value=None):
+        if value is not None and not value and self._value:
+            self.windows += 1
+        return super(CountingPin, self).value(value)
+
+
+def make_device(latch_delay=0.0, **kwargs):
+    """A device with a different load on each channel"""
+    return Stpm34Device(Channel(230.0, 5.0, 50.0), Channel(120.0, 2.5, 60.0),
+                        latch_delay=latch_delay, seed=1, **kwargs)
+
+
+class Rig(object):
+    """One simulated device on an SPI bus with a driver talking to it
+
+    Parameters
+    ----------
+    latch_mode : int, optional
+        Passed on to `stpm34.Stpm34`
+    device : :obj:`stpm34sim.Stpm34Device`, optional
+        The device, `make_device()` if not given
+    bus : :obj:`stpm34sim.FakeSPI`, optional
+        The bus, a clean one if not given
+    **kwargs
+        Passed on to `stpm34.Stpm34`
+    """
+
+    def __init__(self, latch_mode=Stpm34.LATCH_SOFTWARE, device=None, bus=None, **kwargs):
+        self.bus = bus if bus is not None else FakeSPI()
+        self.device = device if device is not None else make_device()
+        self.cs = CountingPin()
+        self.bus.attach(self.device, self.cs)
+        self.meter = Stpm34(self.bus, self.cs, latch_mode=latch_mode, **kwargs)
+
+    def frames(self, op):
+        """Chip select windows op opens"""
+        windows = self.cs.windows
+        op()
+        return self.cs.windows - windows
+
+
+class UartRig(object):
+    """One simulated device on a UART with a driver talking to it
+
+    The device starts at its reset rate of 9600 baud unless ``baudrate``
+    says otherwise, and the host UART is opened at the same rate.
+    """
+
+    def __init__(self, baudrate=9600, max_baudrate=None, **kwargs):
+        self.device = make_device()
+        self.device.rows[0x26] = (self.device.rows[0x26] & ~0xFFFF) | \
+            int(round(16000000 / float(baudrate)))
+        self.uart = FakeUART(self.device, baudrate, max_baudrate)
+        self.meter = Stpm34(self.uart, None, baudrate=baudrate, **kwargs)
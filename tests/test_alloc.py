@@ -0,0 +1,66 @@
+"""Heap checks of the sampling path against the stpm34sim simulator
+
+Run with ``python -m pytest tests`` or directly with ``python
+tests/test_alloc.py``.
+"""
+
+import os
+import tracemalloc
+
+from rig import Rig, Stpm34
+
+PACKAGE = [tracemalloc.Filter(True, "*" + os.sep + "stpm34" + os.sep + "*")]
+
+
+def growth(op, iterations=200):
+    """Blocks allocated in the stpm34 package by op that are still alive
+
+    On CPython every register word is a heap int, so the registers
+    themselves hold one block each; the count is taken after a first
+    round of iterations and again after a second one, so only memory that
+    keeps growing with the number of calls shows up.
+    """
+    op()
+    tracemalloc.start()
+    try:
+        for _ in range(iterations):
+            op()
+        before = tracemalloc.take_snapshot().filter_traces(PACKAGE)
+        for _ in range(iterations):
+            op()
+        after = tracemalloc.take_snapshot().filter_traces(PACKAGE)
+    finally:
+        tracemalloc.stop()
+    return sum(stat.count_diff for stat in after.compare_to(before, "filename"))
+
+
+def test_transfer_does_not_grow_the_heap():
+    transport = Rig().meter._transport
+    assert growth(lambda: transport.transfer(0x48, 0xFF, 0xFF, 0xFF)) == 0
+
+
+def test_read_does_not_grow_the_heap():
+    for mode in (Stpm34.LATCH_AUTO, Stpm34.LATCH_SOFTWARE):
+        meter = Rig(mode).meter
+        # At most the two RMS words changing between small and heap ints
+        assert growth(meter.read) <= len(meter._rms_regs)
+
+
+def test_read_registers_does_not_grow_the_heap():
+    meter = Rig(Stpm34.LATCH_AUTO).meter
+    regs = meter.data_regs.list()
+    assert growth(lambda: meter.read_registers(regs)) <= len(regs)
+
+
+def test_data_registers_stay_out_of_the_shadow():
+    meter = Rig(Stpm34.LATCH_AUTO).meter
+    size = len(meter._shadow)
+    meter.snapshot()
+    assert len(meter._shadow) == size
+
+
+if __name__ == "__main__":
+    for name, test in sorted(globals().items()):
+        if name.startswith("test_"):
+            test()
+            print(name, "ok")
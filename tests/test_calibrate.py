@@ -0,0 +1,55 @@
+"""Calibration against a known load on the simulated device"""
+
+from rig import Rig
+from stpm34.calibrate import RunningStats
+from stpm34sim import Channel, Stpm34Device
+
+
+def test_running_stats():
+    stats = RunningStats()
+    for x in (2.0, 4.0, 4.0, 4.0, 5.0, 5.0, 7.0, 9.0):
+        stats.add(x)
+    assert stats.n == 8
+    assert stats.mean == 5.0
+    assert abs(stats.variance() - 32.0 / 7) < 1e-12
+
+
+def test_calibration_converges_to_the_load(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    load = Channel(230.0, 5.0, 50.0, noise=0.002)
+    device = Stpm34Device(load, Channel(120.0, 2.5, 60.0), latch_delay=0.0, seed=1)
+    meter = Rig(device=device).meter
+    quiet = device.raw_rms(Channel(230.0, 5.0, 50.0), 0)
+
+    calibrator = meter.do_calibration(230.0, 5.0, channels=(1,))
+    v, c = calibrator.stats[0]
+    assert calibrator.min_samples <= calibrator.samples < calibrator.max_samples
+    assert abs(v.mean - quiet[0]) / quiet[0] < 0.002
+    assert abs(c.mean - quiet[1]) / quiet[1] < 0.002
+    assert calibrator.kept == []
+    # The nominal load is what the channel carries, so no correction
+    assert abs(meter.ctrl_regs.dsp_ctrl_5.calibration - 2048) < 10
+    assert abs(meter.ctrl_regs.dsp_ctrl_6.calibration - 2048) < 10
+    assert device.rows[0x08] & 0xFFF == meter.ctrl_regs.dsp_ctrl_5.calibration
+    load.noise = 0.0
+    vrms, irms = meter.read()[:2]
+    assert abs(vrms - 230.0) < 0.1
+    assert abs(irms - 5.0) < 0.01
+
+
+def test_channel_with_no_load_keeps_its_calibration(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    device = Stpm34Device(Channel(230.0, 5.0, 50.0), Channel(120.0, 0.0, 60.0),
+                          latch_delay=0.0, seed=1)
+    meter = Rig(device=device).meter
+    regs = meter.ctrl_regs
+    regs.dsp_ctrl_7.calibration = 0x400
+    regs.dsp_ctrl_8.calibration = 0x500
+    meter.apply_configs()
+
+    calibrator = meter.do_calibration(230.0, 5.0)
+    assert calibrator.kept == [2]
+    assert regs.dsp_ctrl_7.calibration == 0x400
+    assert regs.dsp_ctrl_8.calibration == 0x500
+    assert regs.dsp_ctrl_5.calibration != 0
+    assert capsys.readouterr().out == ""
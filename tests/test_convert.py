@@ -0,0 +1,59 @@
+"""NumPy batch conversion of raw RMS words"""
+
+import io
+import struct
+
+import pytest
+
+from rig import Rig
+
+np = pytest.importorskip("numpy")
+from stpm34.convert import convert_chunks, iter_words, rms_to_units  # noqa: E402
+
+
+class Trickle(io.RawIOBase):
+    """Unbuffered stream that returns at most three bytes per read"""
+
+    def __init__(self, data):
+        self._data = data
+
+    def readable(self):
+        return True
+
+    def read(self, n=-1):
+        chunk, self._data = self._data[:min(n, 3)], self._data[min(n, 3):]
+        return chunk
+
+
+def captured_words(n=16):
+    meter = Rig().meter
+    words = []
+    for _ in range(n):
+        meter.latch()
+        meter.read_registers(meter._rms_regs)
+        words.append(meter._rms_regs[0].to_uint32())
+    return meter, words
+
+
+def test_batch_matches_the_scalar_path():
+    meter, words = captured_words()
+    regs = meter.ctrl_regs
+    volts, amps = rms_to_units(words, calv=regs.dsp_ctrl_5.calibration,
+                               cali=regs.dsp_ctrl_6.calibration, params=meter)
+    for i, word in enumerate(words):
+        assert (volts[i], amps[i]) == meter.convert_rms(1, word)
+
+
+def test_iter_words_carries_partial_words():
+    words = list(range(1, 11))
+    data = struct.pack("<10I", *words) + b"\x01\x02"
+    chunks = list(iter_words(Trickle(data), chunk_words=4))
+    assert [int(w) for chunk in chunks for w in chunk] == words
+    assert all(len(chunk) <= 4 for chunk in chunks)
+
+
+def test_convert_chunks_per_chunk():
+    meter, words = captured_words(8)
+    data = struct.pack("<8I", *words)
+    chunks = list(convert_chunks(iter_words(io.BytesIO(data), chunk_words=3)))
+    assert [len(v) for v, c in chunks] == [3, 3, 2]
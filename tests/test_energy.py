@@ -0,0 +1,50 @@
+"""Energy counters, their unwrapping and scaling"""
+
+from rig import Rig, make_device
+from stpm34 import EnergyAccumulator
+from stpm34.energy import ENERGY_RATE, EnergyCounter
+
+
+class Clock(object):
+    """Simulated time the device runs on, in seconds"""
+
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        return self.t
+
+
+def test_counter_unwraps():
+    counter = EnergyCounter(8)
+    counter.update(250)
+    assert counter.update(4) == 10
+    assert counter.update(250) == -10
+    # Two and a bit wraps, only the expected change tells them apart
+    assert counter.update(4, expected=522) == 522
+    assert counter.total == 522
+
+
+def test_energy_lsb_matches_the_datasheet():
+    rig = Rig()
+    meter, device = rig.meter, rig.device
+    regs = meter.ctrl_regs
+    regs.dsp_ctrl_5.calibration = 0x700
+    regs.dsp_ctrl_6.calibration = 0x900
+    meter.apply_configs()
+    acc = EnergyAccumulator(meter)
+    for ch in (1, 2):
+        expected = device.power_lsb(ch - 1) / (3600 * ENERGY_RATE)
+        assert abs(acc.energy_lsb(ch) - expected) / expected < 1e-12
+
+
+def test_accumulates_watt_hours():
+    clock = Clock()
+    rig = Rig(device=make_device(clock=clock))
+    acc = EnergyAccumulator(rig.meter, ("ph1_active_energy", "ph2_active_energy"))
+    acc.poll()
+    for _ in range(6):
+        clock.t += 10.0
+        assert acc.poll() > 10.0
+    assert abs(acc.wh("ph1_active_energy") - 230.0 * 5.0 / 60) < 0.01
+    assert abs(acc.wh("ph2_active_energy") - 120.0 * 2.5 / 60) < 0.01
@@ -0,0 +1,87 @@
+"""Interrupt driven power quality events on the simulated INT pins"""
+
+from rig import Rig
+from stpm34 import EventMonitor
+from stpm34.events import event_mask
+from stpm34sim import FakePin
+
+DSP_SR1 = 0x20
+SAG = event_mask(["volt_sag_detect"])
+SWELL = event_mask(["current_swell_detect"])
+
+
+def watched(line=1, **kwargs):
+    rig = Rig()
+    pin = FakePin(1)
+    rig.device.attach_int(pin, line)
+    return rig, pin, EventMonitor(rig.meter, pin, line=line, **kwargs)
+
+
+def test_event_is_delivered_and_cleared():
+    rig, pin, monitor = watched()
+    assert monitor.service() == 0
+    rig.device.raise_status(SAG | SWELL)
+    assert pin.value() == 0
+    assert monitor.service() == 2
+    assert sorted(event.kind for event in (monitor.get(), monitor.get())) == \
+        ["current_swell_detect", "volt_sag_detect"]
+    assert monitor.get() is None
+    assert rig.device.rows[DSP_SR1] & (SAG | SWELL) == 0
+    assert pin.value() == 1
+    # Cleared through VOLATILE_MASK, so the same event is sent again next time
+    rig.device.raise_status(SAG)
+    assert monitor.service() == 1
+    assert monitor.get().kind == "volt_sag_detect"
+
+
+def test_second_line_and_callback():
+    events = []
+    rig, pin, monitor = watched(line=2, callback=events.append)
+    rig.device.raise_status(SAG, line=1)
+    assert monitor.service() == 0
+    rig.device.raise_status(SAG, line=2)
+    assert monitor.service() == 1
+    assert [(e.line, e.kind) for e in events] == [(2, "volt_sag_detect")]
+
+
+def test_masked_bits_stay_quiet():
+    rig, pin, monitor = watched(names=["volt_sag_detect"])
+    rig.device.raise_status(SWELL)
+    assert pin.value() == 1
+    assert monitor.service() == 0
+
+
+def test_event_during_setup_is_not_lost():
+    rig = Rig()
+    meter, device = rig.meter, rig.device
+    pin = FakePin(1)
+    device.attach_int(pin)
+    read_register = meter.read_register
+
+    def event_after_first_status_read(reg):
+        result = read_register(reg)
+        meter.read_register = read_register
+        device.raise_status(SAG)
+        return result
+
+    meter.read_register = event_after_first_status_read
+    monitor = EventMonitor(meter, pin)
+    assert monitor.service() == 1
+    assert pin.value() == 1
+
+
+def test_queue_drops_the_oldest():
+    rig, pin, monitor = watched(queue_size=2)
+    for _ in range(3):
+        rig.device.raise_status(SAG)
+        monitor.service()
+    assert monitor.dropped == 1
+    assert len(monitor.events) == 2
+
+
+def test_disable_masks_and_releases_the_pin():
+    rig, pin, monitor = watched()
+    monitor.disable()
+    rig.device.raise_status(SAG)
+    assert pin.value() == 1
+    assert monitor.service() == 0
@@ -0,0 +1,60 @@
+"""Saving and restoring the control registers as a CRC checked image"""
+
+import pytest
+
+from rig import Rig, make_device
+from stpm34 import image
+
+CAL = (0x123, 0x234, 0x345, 0x456)
+
+
+def calibrated_image(path):
+    meter = Rig().meter
+    regs = meter.ctrl_regs
+    for reg, cal in zip((regs.dsp_ctrl_5, regs.dsp_ctrl_6, regs.dsp_ctrl_7, regs.dsp_ctrl_8), CAL):
+        reg.calibration = cal
+    meter.apply_configs()
+    meter.save_image(str(path))
+    return meter
+
+
+def cal_rows(device):
+    return tuple(device.rows[address] & 0xFFF for address in (0x08, 0x0A, 0x0C, 0x0E))
+
+
+def test_image_restores_the_calibration(tmp_path):
+    path = tmp_path / "config.bin"
+    saved = calibrated_image(path)
+    rig = Rig(image=str(path))
+    assert cal_rows(rig.device) == CAL
+    assert [r.to_uint32() for r in rig.meter.ctrl_regs.list()] == \
+        [r.to_uint32() for r in saved.ctrl_regs.list()]
+
+
+def test_corrupt_image_falls_back_to_the_device(tmp_path):
+    path = tmp_path / "config.bin"
+    calibrated_image(path)
+    data = bytearray(path.read_bytes())
+    data[len(data) // 2] ^= 0x01
+    path.write_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        image.decode(bytes(data))
+
+    device = make_device()
+    reset = dict(device.rows)
+    reset_cal = cal_rows(device)
+    rig = Rig(device=device, image=str(path))
+    meter = rig.meter
+    assert reset_cal != CAL
+    assert cal_rows(device) == reset_cal
+    # What read_configs() found, not what the image held
+    assert meter.ctrl_regs.dsp_ctrl_5.to_uint32() == reset[0x08]
+    assert meter.ctrl_regs.dsp_ctrl_8.to_uint32() == reset[0x0E]
+    assert rig.frames(lambda: meter.load_image(str(path))) == 0
+    assert meter.load_image(str(path)) is False
+
+
+def test_missing_image_falls_back_quietly(tmp_path, capsys):
+    rig = Rig(image=str(tmp_path / "missing.bin"))
+    assert rig.meter.load_image(str(tmp_path / "missing.bin")) is False
+    assert capsys.readouterr().out == ""
@@ -0,0 +1,44 @@
+"""Register words and their compiled field layouts"""
+
+import rig  # noqa: F401, puts src on the path
+from stpm34 import Field, Register
+from stpm34.uart_ctrl_regs import CtrlUART1
+
+
+def test_fields_shift_and_mask_the_word():
+    reg = CtrlUART1()
+    reg.from_uint32(0)
+    reg.crc_en = 1
+    reg.crc_poly = 0x107
+    assert reg.to_uint32() == (1 << 14) | 0x07
+    assert reg.crc_poly == 0x07
+    reg.from_uint32(0x1FFFFFFFF)
+    assert reg.to_uint32() == 0xFFFFFFFF
+    assert reg.fields["crc_en"].val == 1
+
+
+def test_runtime_layout_is_shared():
+    a = Register(0x10, 0x0000000F, {"low": Field(0, 4), "high": Field(28, 4)})
+    b = Register(0x12, 0xF0000000, fields={"low": Field(0, 4), "high": Field(28, 4)})
+    assert type(a) is type(b)
+    assert issubclass(type(a), Register)
+    assert (a.low, a.high) == (0xF, 0)
+    assert (b.low, b.high) == (0, 0xF)
+    c = Register(0x14, 0, {"low": Field(0, 8)})
+    assert type(c) is not type(a)
+
+
+def test_non_dict_fields_give_a_plain_register():
+    for fields in (None, [], ("low", Field(0, 4)), {}):
+        reg = Register(0x10, 0x1234, fields)
+        assert type(reg) is Register
+        assert reg.to_uint32() == 0x1234
+        assert len(reg.fields) == 0
+
+
+def test_standalone_field_keeps_its_value():
+    field = Field(4, 4, 0x1F)
+    assert field.val == 0xF
+    assert field.offset_val == 0xF0
+    field.offset_val = 0x35
+    assert field.val == 0x3
@@ -0,0 +1,91 @@
+"""Retries, resync and invalid reads on a bus that corrupts replies"""
+
+import pytest
+
+from rig import Rig, make_device
+from stpm34.stats import INVALID, LATCH_TIMEOUTS, READS, RECOVERED, RETRIES
+from stpm34sim import FakeSPI
+
+
+class FlakySPI(FakeSPI):
+    """Bus that corrupts the replies it is told to, frame by frame
+
+    ``schedule`` is consumed one entry per frame, True corrupts that reply.
+    Once it runs out every reply is clean, or corrupt if ``broken`` is set.
+    """
+
+    def __init__(self):
+        super(FlakySPI, self).__init__()
+        self.schedule = []
+        self.broken = False
+
+    def _exchange(self, tx):
+        reply = super(FlakySPI, self)._exchange(tx)
+        bad = self.schedule.pop(0) if self.schedule else self.broken
+        if bad:
+            reply = bytes([reply[0] ^ 0x01]) + reply[1:]
+        return reply
+
+
+def flaky_rig(**kwargs):
+    return Rig(bus=FlakySPI(), **kwargs)
+
+
+def test_retry_recovers_and_resyncs_the_burst():
+    rig = flaky_rig()
+    meter, device = rig.meter, rig.device
+    counters = meter.stats.counters
+    regs = meter._rms_regs
+    retries, recovered = counters[RETRIES], counters[RECOVERED]
+    # Frame 2 carries the reply for regs[0]
+    rig.bus.schedule = [False, True]
+    assert meter.read_registers(regs) is regs
+    assert counters[RETRIES] == retries + 1
+    assert counters[RECOVERED] == recovered + 1
+    assert regs[0].to_uint32() == device.rows[regs[0].address]
+    assert regs[1].to_uint32() == device.rows[regs[1].address]
+
+
+def test_register_given_up_on_after_every_retry():
+    rig = flaky_rig()
+    meter = rig.meter
+    counters = meter.stats.counters
+    reg = meter.data_regs.dsp_reg14
+    reg.from_uint32(0x12345678)
+    retries, invalid = counters[RETRIES], counters[INVALID]
+    rig.bus.broken = True
+    assert meter.read_registers([reg]) is None
+    assert counters[RETRIES] == retries + meter.retries
+    assert counters[INVALID] == invalid + 1
+    assert reg.to_uint32() == 0x12345678
+
+
+def test_strict_raises():
+    rig = flaky_rig()
+    meter = rig.meter
+    meter.strict = True
+    rig.bus.broken = True
+    with pytest.raises(OSError):
+        meter.read_registers(meter._rms_regs)
+
+
+def test_read_returns_none_on_stuck_latch():
+    rig = Rig(device=make_device(latch_delay=1e9))
+    meter = rig.meter
+    meter.LATCH_POLLS = 3
+    counters = meter.stats.counters
+    reads, timeouts = counters[READS], counters[LATCH_TIMEOUTS]
+    assert meter.read() is None
+    assert counters[READS] == reads
+    assert counters[LATCH_TIMEOUTS] == timeouts + 1
+
+
+def test_bad_register_raises_before_any_frame():
+    rig = Rig()
+    meter = rig.meter
+    regs = [meter.data_regs.dsp_reg14, "dsp_reg15"]
+    frames = rig.cs.windows
+    with pytest.raises(TypeError):
+        meter.read_registers(regs)
+    assert rig.cs.windows == frames
+
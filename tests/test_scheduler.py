@@ -0,0 +1,46 @@
+"""SPI clock tuning of a shared bus"""
+
+from rig import Rig
+from stpm34 import BusScheduler
+from stpm34.framing import Framing
+from stpm34sim import FakeSPI
+
+RATES = (100000, 200000, 400000, 800000, 1600000)
+
+
+def shared_bus(n=2, **kwargs):
+    bus = FakeSPI(100000, **kwargs)
+    rigs = [Rig(bus=bus) for _ in range(n)]
+    return BusScheduler(bus, [rig.meter for rig in rigs]), rigs
+
+
+def test_margin_steps_back_from_the_first_failure():
+    sched, _ = shared_bus(max_baudrate=800000)
+    assert sched.tune_clock(RATES, margin=1) == 400000
+    assert sched.bus.baudrate == 400000
+    assert sched.link_errors[-1][0] == 1600000 and sched.link_errors[-1][1] > 0
+    assert sched.tune_clock(RATES, margin=2) == 200000
+    assert sched.tune_clock(RATES, margin=0) == 800000
+
+
+def test_margin_applies_when_every_rate_passes():
+    sched, _ = shared_bus()
+    assert sched.tune_clock(RATES, margin=1) == 800000
+    assert all(errors == 0 for _, errors in sched.link_errors)
+
+
+def test_slowest_clean_rate_is_kept():
+    sched, _ = shared_bus(max_baudrate=100000)
+    assert sched.tune_clock(RATES, margin=2) == 100000
+    sched, _ = shared_bus(max_baudrate=50000)
+    assert sched.tune_clock(RATES) is None
+    assert sched.bus.baudrate == RATES[0]
+
+
+def test_no_tuning_without_crc(capsys):
+    sched, rigs = shared_bus()
+    rigs[1].meter._transport.set_framing(Framing(crc_en=False))
+    assert rigs[1].meter.qualify_link() is None
+    assert sched.tune_clock(RATES) is None
+    assert sched.bus.baudrate == RATES[0]
+    assert capsys.readouterr().out == ""
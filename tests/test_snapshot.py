@@ -0,0 +1,63 @@
+"""Single latch snapshots of the data registers"""
+
+import pytest
+
+from rig import Rig, Stpm34, make_device
+
+NAMES = ["ph1_active_energy", "dsp_reg14", "ph2_active_energy", "tot_active_energy"]
+AUTO_LATCH = 0x00800000
+
+
+class Ticking(object):
+    """Device clock that moves on a millisecond every time it is read"""
+
+    def __init__(self):
+        self.t = 0.0
+
+    def __call__(self):
+        self.t += 0.001
+        return self.t
+
+
+def auto_rig():
+    return Rig(Stpm34.LATCH_AUTO, device=make_device(clock=Ticking()))
+
+
+def test_auto_latch_snapshot_is_coherent():
+    rig = auto_rig()
+    meter, device = rig.meter, rig.device
+    for _ in range(20):
+        snap = meter.snapshot(NAMES)
+        ph1, ph2 = snap.word("ph1_active_energy"), snap.word("ph2_active_energy")
+        assert abs(ph1 + ph2 - snap.word("tot_active_energy")) <= 2
+    assert meter.latch_mode == Stpm34.LATCH_AUTO
+    assert device.rows[0x04] & AUTO_LATCH
+
+
+def test_without_the_pause_rows_come_from_different_latches():
+    rig = auto_rig()
+    meter = rig.meter
+    snap = meter.snapshot(NAMES, latch=False)
+    ph1, ph2 = snap.word("ph1_active_energy"), snap.word("ph2_active_energy")
+    assert abs(ph1 + ph2 - snap.word("tot_active_energy")) > 2
+
+
+def test_auto_latch_restored_when_the_read_fails():
+    rig = auto_rig()
+    meter, device = rig.meter, rig.device
+    meter.strict = True
+    rig.bus.error_rate = 1.0
+    with pytest.raises(OSError):
+        meter.snapshot(NAMES)
+    rig.bus.error_rate = 0.0
+    assert meter.latch_mode == Stpm34.LATCH_AUTO
+    assert meter.ctrl_regs.dsp_ctrl_3.software_auto_latch == 1
+    assert device.rows[0x04] & AUTO_LATCH
+
+
+def test_names_come_back_in_address_order():
+    meter = Rig().meter
+    snap = meter.snapshot(NAMES)
+    assert snap.names == ("dsp_reg14", "ph1_active_energy", "ph2_active_energy",
+                          "tot_active_energy")
+    assert snap.word("dsp_reg14") == meter.data_regs.dsp_reg14.to_uint32()
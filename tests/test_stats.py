@@ -0,0 +1,30 @@
+"""Per device counters and latency histograms"""
+
+from rig import Rig
+from stpm34.stats import BUCKET_EDGES, COUNTER_NAMES, FRAMES, N_BUCKETS, N_COUNTERS, READS, Stats
+
+
+def test_record_picks_the_bucket():
+    stats = Stats()
+    stats.record(stats.read_hist, 0)
+    stats.record(stats.read_hist, BUCKET_EDGES[0])
+    stats.record(stats.read_hist, BUCKET_EDGES[-1] * 10)
+    assert stats.read_hist[0] == 1
+    assert stats.read_hist[1] == 1
+    assert stats.read_hist[N_BUCKETS - 1] == 1
+
+
+def test_read_is_counted_and_reset_clears():
+    rig = Rig()
+    stats = rig.meter.stats
+    stats.reset()
+    frames = rig.frames(rig.meter.read)
+    assert stats.counters[FRAMES] == frames
+    assert stats.counters[READS] == 1
+    assert sum(stats.read_hist) == 1
+    result = stats.as_dict()
+    assert len(COUNTER_NAMES) == N_COUNTERS
+    assert result["reads"] == 1
+    assert "reads: 1" in stats.summary()
+    stats.reset()
+    assert not any(stats.counters) and not any(stats.read_hist)
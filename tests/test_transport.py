@@ -0,0 +1,44 @@
+"""Frame exchange through the preallocated SPI transport"""
+
+from rig import Rig
+from stpm34.stats import BYTES, CRC_ERRORS, FRAMES
+from stpm34sim import FakeSPI
+
+
+def test_one_window_and_one_frame_per_transfer():
+    rig = Rig()
+    transport = rig.meter._transport
+    counters = rig.meter.stats.counters
+    frames, counted, nbytes = counters[FRAMES], counters[BYTES], rig.bus.bytes
+    assert rig.frames(lambda: transport.transfer(0x48, 0xFF, 0xFF, 0xFF)) == 1
+    assert counters[FRAMES] == frames + 1
+    assert counters[BYTES] == counted + 5
+    assert rig.bus.bytes - nbytes == 5
+
+
+def test_buffers_survive_a_framing_change():
+    rig = Rig()
+    meter = rig.meter
+    transport = meter._transport
+    tx, rx = transport._tx, transport._rx
+    uart_ctrl_1 = meter.ctrl_regs.uart_ctrl_1
+    uart_ctrl_1.crc_en = 0
+    meter.write_register(uart_ctrl_1)
+    assert not rig.device.crc_en()
+    assert transport.framing.size == 4
+    assert transport._tx is tx and transport._rx is rx
+    nbytes = rig.bus.bytes
+    assert meter.read_register(meter.data_regs.dsp_reg14) is not None
+    assert (rig.bus.bytes - nbytes) % 4 == 0
+    assert meter.data_regs.dsp_reg14.to_uint32() == rig.device.rows[0x48]
+
+
+def test_corrupt_reply_is_counted_and_not_decoded():
+    rig = Rig(bus=FakeSPI(error_rate=1.0, seed=1))
+    meter = rig.meter
+    crc_errors = meter.stats.counters[CRC_ERRORS]
+    reg = meter.data_regs.dsp_reg14
+    reg.from_uint32(0x12345678)
+    assert meter.read_register(reg) is None
+    assert meter.stats.counters[CRC_ERRORS] > crc_errors
+    assert reg.to_uint32() == 0x12345678
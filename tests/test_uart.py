@@ -0,0 +1,61 @@
+"""UART transport and baud rate changes against `stpm34sim.FakeUART`"""
+
+from rig import Rig, UartRig
+from stpm34.stats import LINK_LOST
+
+
+def test_reads_at_the_reset_rate():
+    rig = UartRig()
+    meter = rig.meter
+    assert meter.read_register(meter.data_regs.dsp_reg14) is not None
+    assert meter.data_regs.dsp_reg14.to_uint32() == rig.device.rows[0x48]
+
+
+def test_upgrade_stops_at_the_fastest_clean_rate():
+    rig = UartRig(max_baudrate=115200)
+    meter = rig.meter
+    assert meter.upgrade_baudrate() == 115200
+    assert rig.uart.baudrate == 115200
+    assert abs(rig.uart.device_baudrate() - 115200) < 0.02 * 115200
+    assert meter.read() is not None
+    assert meter.stats.counters[LINK_LOST] == 0
+
+
+def test_upgrade_when_already_fast():
+    rig = UartRig(baudrate=115200, max_baudrate=115200)
+    meter = rig.meter
+    assert meter.upgrade_baudrate() == 115200
+    assert meter.read() is not None
+
+
+def test_failed_switch_falls_back_to_the_working_rate():
+    rig = UartRig(baudrate=115200, max_baudrate=115200)
+    meter = rig.meter
+    # The host was told the wrong rate, the divider read back is right
+    meter._transport.baudrate = 9600
+    assert not meter.set_baudrate(460800)
+    assert rig.uart.baudrate == 115200
+    assert abs(rig.uart.device_baudrate() - 115200) < 0.02 * 115200
+    assert meter.read() is not None
+    assert meter.stats.counters[LINK_LOST] == 0
+
+
+def test_device_lost_on_the_way_back_is_counted():
+    rig = UartRig(max_baudrate=115200)
+    meter, device = rig.meter, rig.device
+    write_half = device.write_half
+
+    def first_write_only(address, half):
+        write_half(address, half)
+        device.write_half = lambda address, half: None
+
+    device.write_half = first_write_only
+    assert not meter.set_baudrate(460800)
+    assert meter.stats.counters[LINK_LOST] == 1
+
+
+def test_not_on_a_uart(capsys):
+    meter = Rig().meter
+    assert meter.set_baudrate(115200) is False
+    assert meter.upgrade_baudrate() is None
+    assert capsys.readouterr().out == ""
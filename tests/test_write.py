@@ -0,0 +1,62 @@
+"""Shadowed writes and the write-and-verify burst"""
+
+import pytest
+
+from rig import Rig
+from stpm34.stats import VERIFY_ERRORS
+
+
+def test_write_register_sends_only_changed_halves():
+    rig = Rig()
+    meter, device = rig.meter, rig.device
+    reg = meter.ctrl_regs.dsp_ctrl_5
+    assert rig.frames(lambda: meter.write_register(reg)) == 0
+    reg.calibration = 0x123
+    assert rig.frames(lambda: meter.write_register(reg)) == 1
+    reg.calibration = 0x456
+    reg.sag_thresh = 0x155
+    assert rig.frames(lambda: meter.write_register(reg)) == 2
+    assert device.rows[reg.address] == reg.to_uint32()
+    assert rig.frames(lambda: meter.write_register(reg, force=True)) == 2
+
+
+def test_write_registers_verifies_in_h_plus_2_frames():
+    rig = Rig()
+    meter, device = rig.meter, rig.device
+    one, two = meter.ctrl_regs.dsp_ctrl_5, meter.ctrl_regs.dsp_ctrl_6
+    one.calibration = 0x321
+    two.calibration = 0x654
+    two.sag_thresh = 0x0AA
+    errors = meter.stats.counters[VERIFY_ERRORS]
+    written = []
+    # Three changed halves, read back inside the burst
+    assert rig.frames(lambda: written.extend(meter.write_registers([one, two]))) == 3 + 2
+    assert written == [one, two]
+    assert device.rows[one.address] == one.to_uint32()
+    assert device.rows[two.address] == two.to_uint32()
+    assert meter.stats.counters[VERIFY_ERRORS] == errors
+
+
+def test_write_the_device_ignores_fails_verification():
+    rig = Rig()
+    meter, device = rig.meter, rig.device
+    reg = meter.ctrl_regs.dsp_ctrl_5
+    device.write_half = lambda address, half: None
+    errors = meter.stats.counters[VERIFY_ERRORS]
+    reg.calibration = 0x777
+    meter.write_registers([reg])
+    assert meter.stats.counters[VERIFY_ERRORS] == errors + 1
+
+
+def test_non_register_raises_before_any_frame():
+    rig = Rig()
+    meter = rig.meter
+    reg = meter.ctrl_regs.dsp_ctrl_5
+    reg.calibration = 0x111
+    frames = rig.cs.windows
+    with pytest.raises(TypeError):
+        meter.write_register(0x08)
+    with pytest.raises(TypeError):
+        meter.write_registers([reg, "dsp_ctrl_6"], force=True)
+    assert rig.cs.windows == frames
+    assert rig.device.rows[reg.address] != reg.to_uint32()